@@ -1,14 +1,40 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+import base64
+import hashlib
+import heapq
 import json
+import math
 import os
+import secrets
+import signal
+import threading
+from collections.abc import Mapping
+
+import numpy as np
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from inference_pool import InferenceUnavailable
 from model_predictor import HousingPredictor
-from scoring_engine import calculate_compatibility_score
-from neighborhood_data import get_nyc_neighborhoods
+from model_registry import ModelRegistry
+from scoring_engine import NeighborhoodMatrix, score_neighborhoods, score_neighborhoods_with_breakdown
+from response_encoding import (
+    JSON_MIMETYPE,
+    MSGPACK_MIMETYPE,
+    FragmentCache,
+    packb,
+    splice,
+    wants_msgpack
+)
+from spatial_index import GridIndex, SpatialIndex, grid_cells
+from session_store import SessionStore
+from state_store import DEFAULT_DB_PATH, DEFAULT_POOL_SIZE, DEFAULT_SESSION, StateStore
+from transit_matrix import DEFAULT_TRANSIT_PATH, TransitMatrix
+from write_behind import DEFAULT_JOURNAL_PATH, WriteBehindStore
+from neighborhood_data import get_catalog
 from claude_portfolio import (
     derive_preference_weights,
     build_persona_profile,
@@ -16,7 +42,20 @@ from claude_portfolio import (
     generate_claude_portfolio_summary
 )
 
+
+
+class CatalogJSONProvider(DefaultJSONProvider):
+    """Serialize the catalog's read-only neighborhood records like dicts"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Mapping):
+            return dict(o)
+        return DefaultJSONProvider.default(o)
+
+
 app = Flask(__name__)
+app.json = CatalogJSONProvider(app)
 
 # --- FIXED CORS (WORKS 100%) ---
 CORS(
@@ -33,77 +72,264 @@ def add_cors_headers(response):
     return response
 
 
-# Initialize ML model
-predictor = HousingPredictor()
+def location_features(neighborhood):
+    """Model input columns that are fixed for a neighborhood"""
+    return {
+        'ADMINISTRATIVE_AREA_LEVEL_2': neighborhood['admin_area'],
+        'LOCALITY': neighborhood['locality'],
+        'SUBLOCALITY': neighborhood['sublocality'],
+        'STREET_NAME': neighborhood['street_name'],
+        'LATITUDE': neighborhood['lat'],
+        'LONGITUDE': neighborhood['lng']
+    }
 
-APP_STATE_FILE = 'data/app_state.json'
 
-def load_app_state():
-    if os.path.exists(APP_STATE_FILE):
-        with open(APP_STATE_FILE, 'r') as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                pass
-    return {
-        'quiz_results': None,
-        'reviews': {}
+# Serve the registry's active version when there is one, else the bundled model
+model_registry = ModelRegistry(os.environ.get('MODEL_REGISTRY_DIR', 'models/registry'))
+active_entry = model_registry.active()
+model_source = {}
+if active_entry:
+    model_source = {
+        'model_path': active_entry['model_path'],
+        'version': active_entry['version'],
+        'grid_path': active_entry['grid_path']
     }
 
-def save_app_state():
-    os.makedirs('data', exist_ok=True)
-    with open(APP_STATE_FILE, 'w') as f:
-        json.dump(app_state, f, indent=2)
+# Neighborhoods are loaded and indexed once; routes share the read-only records
+catalog = get_catalog()
 
-app_state = load_app_state()
+# Initialize ML model, pre-encoding the fixed features of every neighborhood.
+# Loading and warmup run in the background so the server starts immediately.
+predictor = HousingPredictor(
+    locations=[location_features(n) for n in catalog],
+    load_async=os.environ.get('MODEL_LOAD_ASYNC', '1') == '1',
+    **model_source
+)
+
+# Precomputed transit minutes (python transit_matrix.py <gtfs dir>); commute falls back to miles without it
+transit_matrix = TransitMatrix.load(os.environ.get('TRANSIT_MATRIX_PATH', DEFAULT_TRANSIT_PATH))
+if transit_matrix is not None:
+    print(f"Transit matrix loaded: {transit_matrix.minutes.shape[1]} stations")
+
+# Neighborhood attributes as one float matrix, in catalog id order
+neighborhood_matrix = NeighborhoodMatrix.from_store(catalog.store, transit_matrix)
+neighborhood_index = SpatialIndex(neighborhood_matrix.radians)
+neighborhood_grid = GridIndex(np.degrees(neighborhood_matrix.radians))
+
+# Static neighborhood JSON, serialized once per neighborhood and spliced into responses
+detail_fragments = FragmentCache(lambda row: catalog[row])
+
+model_reload = {'version': None, 'state': 'idle', 'error': None}
+model_reload_lock = threading.Lock()
+
+
+def begin_model_reload(version):
+    """Claim the single reload slot for version; False if another version is still loading"""
+    with model_reload_lock:
+        if model_reload['state'] == 'loading':
+            return False
+        model_reload.update(version=version, state='loading', error=None)
+        return True
+
+
+def activate_model_version(entry):
+    """Load a registry version claimed with begin_model_reload and swap it in"""
+    try:
+        predictor.load_version(entry['model_path'], entry['version'], entry['grid_path'])
+    except Exception as e:
+        with model_reload_lock:
+            model_reload.update(state='failed', error=str(e))
+        raise
+    with model_reload_lock:
+        model_reload.update(state='active')
+
+
+def on_registry_change(entry):
+    """Registry watcher callback; while an admin activation is loading, the next poll retries"""
+    if begin_model_reload(entry['version']):
+        activate_model_version(entry)
+
+
+registry_poll_seconds = float(os.environ.get('MODEL_REGISTRY_POLL_SECONDS', 0))
+if registry_poll_seconds > 0:
+    model_registry.watch(on_registry_change, lambda: predictor.version, registry_poll_seconds)
+
+# Quiz results and reviews live in SQLite; a legacy JSON state file is imported once
+LEGACY_STATE_FILE = 'data/app_state.json'
+state_store = StateStore(
+    os.environ.get('STATE_DB_PATH', DEFAULT_DB_PATH),
+    pool_size=int(os.environ.get('STATE_DB_POOL_SIZE', DEFAULT_POOL_SIZE))
+)
+state_store.migrate_json(LEGACY_STATE_FILE)
+
+# Optionally answer writes from memory and persist them in the background (see write_behind.py)
+STATE_WRITE_MODE = os.environ.get('STATE_WRITE_MODE', 'sync')
+if STATE_WRITE_MODE != 'sync':
+    state_store = WriteBehindStore(
+        state_store,
+        mode=STATE_WRITE_MODE,
+        flush_seconds=float(os.environ.get('STATE_FLUSH_SECONDS', 1.0)),
+        max_pending=int(os.environ.get('STATE_FLUSH_MAX_PENDING', 500)),
+        journal_path=os.environ.get('STATE_JOURNAL_PATH', DEFAULT_JOURNAL_PATH)
+    )
+
+previous_signal_handlers = {}
+
+
+def flush_state_and_exit(signum, frame):
+    """Flush buffered state writes on SIGTERM/SIGINT, then stop as the previous handler would"""
+    # The interrupted main thread may hold the store's locks, so flush on another thread;
+    # it is not a daemon, so the interpreter waits for it before exiting
+    threading.Thread(target=state_store.close, name='state-final-flush').start()
+    previous = previous_signal_handlers.get(signum)
+    if callable(previous):
+        previous(signum, frame)
+    elif previous != signal.SIG_IGN:
+        raise SystemExit(128 + signum)
+
+
+# atexit never runs on a plain SIGTERM (the usual container stop), so flush from the signal itself.
+# Signal handlers can only be installed from the main thread.
+if STATE_WRITE_MODE != 'sync' and threading.current_thread() is threading.main_thread():
+    for stop_signal in (signal.SIGTERM, signal.SIGINT):
+        previous_signal_handlers[stop_signal] = signal.signal(stop_signal, flush_state_and_exit)
+
+SAMPLE_REVIEWS = {
+    'Williamsburg': [
+        {
+            'author': 'Sarah M.',
+            'rating': 5,
+            'comment': 'Love the artsy vibe and amazing food scene! Tons of great coffee shops and easy access to Manhattan via the L train.',
+            'date': '2025-10-15T14:30:00'
+        },
+        {
+            'author': 'Mike T.',
+            'rating': 4,
+            'comment': 'Great neighborhood but can get pretty crowded on weekends. Nightlife is fantastic though!',
+            'date': '2025-10-01T18:45:00'
+        }
+    ],
+    'Astoria': [
+        {
+            'author': 'Elena K.',
+            'rating': 5,
+            'comment': 'Best Greek food in NYC! Very diverse community and more affordable than Manhattan. Love it here.',
+            'date': '2025-09-20T12:00:00'
+        },
+        {
+            'author': 'David L.',
+            'rating': 4,
+            'comment': 'Great value for money, authentic restaurants, and close to the park. Just wish the subway was closer to some parts.',
+            'date': '2025-09-12T09:30:00'
+        }
+    ],
+    'Park Slope': [
+        {
+            'author': 'Jennifer W.',
+            'rating': 5,
+            'comment': 'Perfect for families! Beautiful brownstones, great schools, and Prospect Park is amazing. Very safe neighborhood.',
+            'date': '2025-10-28T16:20:00'
+        },
+        {
+            'author': 'Tom R.',
+            'rating': 5,
+            'comment': 'Charming neighborhood with a real community feel. Farmers market on weekends is fantastic!',
+            'date': '2025-10-10T11:15:00'
+        }
+    ]
+}
 
 # Initialize with some sample reviews if none exist
-if 'reviews' not in app_state or not app_state['reviews']:
-    app_state['reviews'] = {
-        'Williamsburg': [
-            {
-                'author': 'Sarah M.',
-                'rating': 5,
-                'comment': 'Love the artsy vibe and amazing food scene! Tons of great coffee shops and easy access to Manhattan via the L train.',
-                'date': '2025-10-15T14:30:00'
-            },
-            {
-                'author': 'Mike T.',
-                'rating': 4,
-                'comment': 'Great neighborhood but can get pretty crowded on weekends. Nightlife is fantastic though!',
-                'date': '2025-10-01T18:45:00'
-            }
-        ],
-        'Astoria': [
-            {
-                'author': 'Elena K.',
-                'rating': 5,
-                'comment': 'Best Greek food in NYC! Very diverse community and more affordable than Manhattan. Love it here.',
-                'date': '2025-09-20T12:00:00'
-            },
-            {
-                'author': 'David L.',
-                'rating': 4,
-                'comment': 'Great value for money, authentic restaurants, and close to the park. Just wish the subway was closer to some parts.',
-                'date': '2025-09-12T09:30:00'
-            }
-        ],
-        'Park Slope': [
-            {
-                'author': 'Jennifer W.',
-                'rating': 5,
-                'comment': 'Perfect for families! Beautiful brownstones, great schools, and Prospect Park is amazing. Very safe neighborhood.',
-                'date': '2025-10-28T16:20:00'
-            },
-            {
-                'author': 'Tom R.',
-                'rating': 5,
-                'comment': 'Charming neighborhood with a real community feel. Farmers market on weekends is fantastic!',
-                'date': '2025-10-10T11:15:00'
-            }
-        ]
-    }
-    save_app_state()
+state_store.seed_reviews(SAMPLE_REVIEWS)
+
+# Quiz results per session (the bearer token), in sharded memory backed by state_store
+sessions = SessionStore(
+    state_store,
+    shards=int(os.environ.get('SESSION_SHARDS', 64)),
+    ttl_seconds=int(os.environ.get('SESSION_TTL_SECONDS', 30 * 24 * 3600)),
+    cache_seconds=float(os.environ.get('SESSION_CACHE_SECONDS', 5))
+)
+sessions.start_sweeper(float(os.environ.get('SESSION_SWEEP_SECONDS', 600)))
+
+
+def session_id():
+    """
+    The caller's session key: a SHA-256 of its bearer token, or the shared
+    default session without one. Only the hash is stored, so the state
+    database never holds live credentials.
+    """
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() == 'bearer' and token.strip():
+        return hashlib.sha256(token.strip().encode()).hexdigest()
+    return DEFAULT_SESSION
+
+# -------------------------------
+# HEALTH ROUTES
+# -------------------------------
+
+@app.route('/api/health', methods=['GET'])
+def health():
+    return jsonify({'status': 'ok'}), 200
+
+
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    status = predictor.status()
+    if not status['ready']:
+        return jsonify({'status': 'loading', **status}), 503
+    return jsonify({'status': 'ready', **status}), 200
+
+
+# -------------------------------
+# ADMIN ROUTES
+# -------------------------------
+
+def admin_authorized():
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    if not admin_token:
+        return False
+    # Constant-time comparison: this token can swap the production model
+    supplied = request.headers.get('X-Admin-Token', '')
+    return secrets.compare_digest(supplied.encode(), admin_token.encode())
+
+
+@app.route('/api/admin/models', methods=['GET'])
+def list_model_versions():
+    if not admin_authorized():
+        return jsonify({'error': 'Admin token required'}), 403
+
+    with model_reload_lock:
+        reload_status = dict(model_reload)
+    return jsonify({
+        'active_version': predictor.version,
+        'versions': model_registry.list_versions(),
+        'reload': reload_status
+    }), 200
+
+
+@app.route('/api/admin/models/<version>/activate', methods=['POST'])
+def activate_model(version):
+    if not admin_authorized():
+        return jsonify({'error': 'Admin token required'}), 403
+
+    try:
+        entry = model_registry.get(version)
+    except (KeyError, ValueError):
+        return jsonify({'error': f'Unknown model version: {version}'}), 404
+
+    if not begin_model_reload(version):
+        return jsonify({'error': 'Another model version is still loading'}), 409
+
+    def load_and_promote():
+        try:
+            activate_model_version(entry)
+            model_registry.set_active(version)
+        except Exception as e:
+            print(f"Model version {version} was not activated: {e}")
+
+    threading.Thread(target=load_and_promote, name='model-reload', daemon=True).start()
+    return jsonify({'message': f'Loading model version {version}', 'version': version}), 202
+
 
 # Auth Routes
 @app.route('/api/auth/signup', methods=['POST'])
@@ -115,7 +341,7 @@ def signup():
     email = data.get('email') or 'guest@nyc.local'
     password = data.get('password') or 'guest'
 
-    return jsonify({'token': 'demo-token', 'email': email}), 201
+    return jsonify({'token': secrets.token_urlsafe(32), 'email': email}), 201
 
 
 @app.route('/api/auth/login', methods=['POST', 'OPTIONS'])
@@ -127,7 +353,7 @@ def login():
     email = data.get('email') or 'guest@nyc.local'
     password = data.get('password') or 'guest'
 
-    return jsonify({'token': 'demo-token', 'email': email}), 200
+    return jsonify({'token': secrets.token_urlsafe(32), 'email': email}), 200
 
 
 # -------------------------------
@@ -140,15 +366,14 @@ def submit_quiz():
         return '', 200
 
     quiz_data = request.get_json() or {}
-    app_state['quiz_results'] = quiz_data
-    save_app_state()
+    sessions.set(session_id(), quiz_data)
 
     return jsonify({'message': 'Quiz saved successfully'}), 200
 
 
 @app.route('/api/quiz/results', methods=['GET'])
 def get_quiz_results():
-    results = app_state.get('quiz_results')
+    results = sessions.get(session_id())
     return jsonify({'results': results}), 200
 
 
@@ -161,6 +386,11 @@ def predict_housing():
     if request.method == "OPTIONS":
         return '', 200
 
+    if not predictor.is_ready():
+        response = jsonify({'error': 'Prediction model is still loading, please retry shortly'})
+        response.headers['Retry-After'] = '2'
+        return response, 503
+
     data = request.get_json()
 
     # User inputs
@@ -169,58 +399,373 @@ def predict_housing():
     baths = data.get('baths')
     property_type = data.get('propertyType', 'CONDO')
     property_sqft = data.get('propertySqft', 1000)
-    years_future = data.get('yearsFuture', 0)
 
-    quiz_results = app_state.get('quiz_results') or {}
-    neighborhoods = get_nyc_neighborhoods()
+    # yearsFuture may be one horizon or a list of them for a price chart
+    try:
+        horizons, is_trajectory = parse_horizons(data.get('yearsFuture', 0))
+        appreciation_rates = parse_appreciation_rates(data.get('appreciationRates'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # An optional map viewport and borough filter limit scoring and pricing to matching neighborhoods
+    try:
+        rows, zoom = parse_viewport(data.get('bbox'), data.get('zoom'))
+        filters = PredictionFilters.from_request(data)
+        fields = parse_fields(data.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if filters.boroughs is not None:
+        borough_rows = np.unique(np.concatenate(
+            [catalog.borough_rows(borough) for borough in filters.boroughs] + [np.empty(0, dtype=np.intp)]
+        ))
+        rows = borough_rows if rows is None else np.intersect1d(rows, borough_rows)
+    if rows is None:
+        neighborhoods, matrix, location_ids = catalog, neighborhood_matrix, range(len(catalog))
+    else:
+        neighborhoods = [catalog[int(row)] for row in rows]
+        matrix, location_ids = neighborhood_matrix.subset(rows), rows
 
-    predictions = []
+    # The per-component breakdown comes out of the same scoring pass, so it is free to include
+    include_breakdown = bool(data.get('includeBreakdown'))
+
+    quiz_results = sessions.get(session_id()) or {}
 
-    for neighborhood in neighborhoods:
-        prediction_input = {
+    # Score the quiz against every neighborhood in one pass
+    try:
+        if include_breakdown:
+            lifestyle_scores, components = score_neighborhoods_with_breakdown(quiz_results, matrix)
+        else:
+            lifestyle_scores = score_neighborhoods(quiz_results, matrix)
+    except (TypeError, ValueError, KeyError) as e:
+        return jsonify({'error': f'Saved quiz results are invalid: {e}'}), 400
+
+    prediction_inputs = [
+        {
             'TYPE': property_type,
             'BEDS': beds,
             'BATH': baths,
             'PROPERTYSQFT': property_sqft,
-            'ADMINISTRATIVE_AREA_LEVEL_2': neighborhood['admin_area'],
-            'LOCALITY': neighborhood['locality'],
-            'SUBLOCALITY': neighborhood['sublocality'],
-            'STREET_NAME': neighborhood['street_name'],
-            'LATITUDE': neighborhood['lat'],
-            'LONGITUDE': neighborhood['lng']
+            **location_features(neighborhood)
         }
+        for neighborhood in neighborhoods
+    ]
+    # Pin this request to one model version even if a new one is swapped in meanwhile
+    active_model = predictor.active_model()
+
+    # Rows follow the same neighborhood order the predictor was built with
+    try:
+        trajectories = predictor.predict_trajectories(
+            prediction_inputs,
+            horizons,
+            [appreciation_rates.get(n['admin_area'], DEFAULT_APPRECIATION_RATE) for n in neighborhoods],
+            location_ids=location_ids,
+            active_model=active_model
+        )
+    except InferenceUnavailable as e:
+        response = jsonify({'error': f'Prediction service is busy: {e}'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
+    # Score and filter on plain numbers first; only the rows returned are built into dicts
+    candidates = []
+
+    for i, (neighborhood, trajectory, lifestyle_score) in enumerate(zip(neighborhoods, trajectories, lifestyle_scores)):
+        # Affordability is judged on the first requested horizon
+        predicted_price = trajectory[0]
+        if predicted_price != predicted_price:  # NaN: this row failed in the model
+            print(f"Error predicting for {neighborhood['name']}: no price returned")
+            continue
 
         try:
-            predicted_price = predictor.predict(prediction_input, years_future)
+            predicted_price = float(predicted_price)
             affordability_score = calculate_affordability_score(predicted_price, budget)
-            lifestyle_score = calculate_compatibility_score(quiz_results, neighborhood)
+            lifestyle_score = float(lifestyle_score)
             combined_score = (affordability_score * 0.5) + (lifestyle_score * 0.5)
-
-            predictions.append({
-                'name': neighborhood['name'],
-                'lat': neighborhood['lat'],
-                'lng': neighborhood['lng'],
-                'predicted_price': round(predicted_price, 2),
-                'affordability_score': round(affordability_score, 2),
-                'lifestyle_score': round(lifestyle_score, 2),
-                'combined_score': round(combined_score, 2),
-                'color': get_color_from_score(combined_score),
-                'details': neighborhood
-            })
-
         except Exception as e:
             print(f"Error predicting for {neighborhood['name']}: {e}")
             continue
 
-    predictions.sort(key=lambda x: x['combined_score'], reverse=True)
+        if not filters.accepts(predicted_price, combined_score):
+            continue
+        # Best combined score first, ties in catalog order; the cursor is the last key served
+        key = (-round(combined_score, 2), neighborhood['id'])
+        if filters.cursor is not None and key <= filters.cursor:
+            continue
+        candidates.append((key, i, predicted_price, affordability_score, lifestyle_score, combined_score))
 
-    return jsonify({'predictions': predictions}), 200
+    if filters.limit is None:
+        selected = sorted(candidates)
+    else:
+        selected = heapq.nsmallest(filters.limit, candidates)
+
+    # Running review totals for the returned rows only, one indexed lookup per batch of names
+    review_summaries = None
+    if fields is None or 'review_summary' in fields:
+        review_summaries = state_store.review_stats(neighborhoods[i]['name'] for _, i, *_ in selected)
+
+    predictions = []
+    for key, i, predicted_price, affordability_score, lifestyle_score, combined_score in selected:
+        neighborhood = neighborhoods[i]
+        prediction = {
+            'name': neighborhood['name'],
+            'lat': neighborhood['lat'],
+            'lng': neighborhood['lng'],
+            'predicted_price': round(predicted_price, 2),
+            'affordability_score': round(affordability_score, 2),
+            'lifestyle_score': round(lifestyle_score, 2),
+            'combined_score': round(combined_score, 2),
+            'color': get_color_from_score(combined_score),
+            'details': neighborhood
+        }
+        if is_trajectory:
+            prediction['price_trajectory'] = [round(float(p), 2) for p in trajectories[i]]
+        if include_breakdown:
+            prediction['score_breakdown'] = {
+                name: None if values[i] != values[i] else round(float(values[i]), 2)
+                for name, values in components.items()
+            }
+        if review_summaries is not None:
+            prediction['review_summary'] = review_summaries[neighborhood['name']]
+        predictions.append(prediction)
+
+    response = {'predictions': predictions, 'model_version': active_model.version}
+    if filters.limit is not None and len(candidates) > filters.limit:
+        response['next_cursor'] = encode_cursor(selected[-1][0])
+    if zoom is not None and zoom < CLUSTER_MAX_ZOOM:
+        response['predictions'], response['clusters'] = cluster_predictions(predictions, zoom)
+    if is_trajectory:
+        response['horizons'] = horizons
+    if fields is not None:
+        for prediction in response['predictions']:
+            for key in prediction.keys() - fields:
+                del prediction[key]
+    return encode_predictions(response)
+
+
+def encode_predictions(response):
+    """
+    Serialize a predict response as MessagePack if the client asked for it,
+    otherwise as JSON with each neighborhood's cached details spliced in
+    """
+    if wants_msgpack(request.accept_mimetypes):
+        return Response(packb(response), mimetype=MSGPACK_MIMETYPE)
+    items = []
+    for prediction in response['predictions']:
+        details = prediction.pop('details', None)
+        if details is None:
+            items.append(splice(prediction, None))
+        else:
+            items.append(splice(prediction, [('details', detail_fragments.get(details['id']))]))
+    rest = {key: value for key, value in response.items() if key != 'predictions'}
+    return Response(splice(rest, [('predictions', b'[' + b','.join(items) + b']')]), mimetype=JSON_MIMETYPE)
 
 
 # -------------------------------
 # SCORING HELPERS
 # -------------------------------
 
+DEFAULT_APPRECIATION_RATE = float(os.environ.get('APPRECIATION_RATE', 0.05))
+MAX_HORIZONS = 50
+MAX_YEARS_FUTURE = 100
+# Annual appreciation rates outside (-100%, +100%] are treated as input errors
+MIN_APPRECIATION_RATE = -1.0
+MAX_APPRECIATION_RATE = 1.0
+# Below this map zoom level, nearby predictions are merged into clusters
+CLUSTER_MAX_ZOOM = int(os.environ.get('CLUSTER_MAX_ZOOM', 12))
+MAX_ZOOM = 22
+
+
+PREDICTION_FIELDS = (
+    'name', 'lat', 'lng', 'predicted_price', 'affordability_score', 'lifestyle_score',
+    'combined_score', 'color', 'details', 'price_trajectory', 'score_breakdown', 'review_summary'
+)
+
+
+def parse_fields(fields):
+    """Set of prediction keys to return, from a list or comma-separated string (None: all)"""
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+    if not isinstance(fields, list) or not all(isinstance(field, str) for field in fields):
+        raise ValueError('fields must be a list or comma-separated string of field names')
+    unknown = set(fields) - set(PREDICTION_FIELDS)
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(sorted(unknown))}')
+    return set(fields)
+
+
+def parse_viewport(bbox, zoom):
+    """
+    Return (rows, zoom) for an optional [south, west, north, east] box and zoom level
+
+    rows is None without a box, otherwise the catalog ids inside it.
+    """
+    if zoom is not None:
+        if isinstance(zoom, bool) or not isinstance(zoom, (int, float)) or not 0 <= zoom <= MAX_ZOOM:
+            raise ValueError(f'zoom must be a number between 0 and {MAX_ZOOM}')
+    if bbox is None:
+        return None, zoom
+    try:
+        south, west, north, east = (float(v) for v in bbox)
+    except (TypeError, ValueError):
+        raise ValueError('bbox must be [south, west, north, east]')
+    if not (-90 <= south <= north <= 90 and -180 <= west <= east <= 180):
+        raise ValueError('bbox must satisfy south <= north and west <= east within lat/lng range')
+    return neighborhood_grid.in_bbox(south, west, north, east), zoom
+
+
+class PredictionFilters:
+    """Optional /api/predict result filters and paging"""
+    COLORS = ('green', 'yellow', 'red')
+    MAX_LIMIT = 1000
+
+    def __init__(self, min_score=None, colors=None, boroughs=None, max_price=None, limit=None, cursor=None):
+        self.min_score = min_score
+        self.colors = colors
+        self.boroughs = boroughs
+        self.max_price = max_price
+        self.limit = limit
+        self.cursor = cursor
+
+    @classmethod
+    def from_request(cls, data):
+        """
+        Read minScore, colors, boroughs, maxPrice, limit and cursor
+
+        Raises:
+            ValueError: on a malformed option
+        """
+        def number(name):
+            value = data.get(name)
+            if value is None:
+                return None
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f'{name} must be a number')
+            return float(value)
+
+        def string_set(name, allowed=None):
+            values = data.get(name)
+            if values is None:
+                return None
+            if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+                raise ValueError(f'{name} must be a list of strings')
+            if allowed is not None and not set(values) <= set(allowed):
+                raise ValueError(f'{name} must be drawn from {", ".join(allowed)}')
+            return set(values)
+
+        limit = data.get('limit')
+        if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int)
+                                  or not 1 <= limit <= cls.MAX_LIMIT):
+            raise ValueError(f'limit must be an integer between 1 and {cls.MAX_LIMIT}')
+        cursor = data.get('cursor')
+        return cls(
+            min_score=number('minScore'),
+            colors=string_set('colors', cls.COLORS),
+            boroughs=string_set('boroughs'),
+            max_price=number('maxPrice'),
+            limit=limit,
+            cursor=None if cursor is None else decode_cursor(cursor)
+        )
+
+    def accepts(self, predicted_price, combined_score):
+        if self.min_score is not None and combined_score < self.min_score:
+            return False
+        if self.max_price is not None and predicted_price > self.max_price:
+            return False
+        if self.colors is not None and get_color_from_score(combined_score) not in self.colors:
+            return False
+        return True
+
+
+def encode_cursor(key):
+    """Opaque paging token for the last key served, e.g. (negated score, id)"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        score, row = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), int(row)
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError('cursor is invalid')
+
+
+def cluster_predictions(predictions, zoom):
+    """
+    Merge predictions that share a cluster cell at this zoom level
+
+    Cells are a quarter of a map tile wide, so on screen the number of
+    clusters stays roughly constant however many neighborhoods are visible.
+
+    Returns:
+        (predictions, clusters): lone predictions unchanged, and one
+        aggregate per cell holding two or more, best combined score first
+    """
+    if not predictions:
+        return predictions, []
+    cell_degrees = 360 / 2 ** zoom / 4
+    labels = grid_cells([[p['lat'], p['lng']] for p in predictions], cell_degrees)
+    groups = {}
+    for label, prediction in zip(labels, predictions):
+        groups.setdefault(label, []).append(prediction)
+
+    singles, clusters = [], []
+    for members in groups.values():
+        if len(members) == 1:
+            singles.append(members[0])
+            continue
+        count = len(members)
+        prices = [m['predicted_price'] for m in members]
+        combined_score = sum(m['combined_score'] for m in members) / count
+        clusters.append({
+            'lat': round(sum(m['lat'] for m in members) / count, 6),
+            'lng': round(sum(m['lng'] for m in members) / count, 6),
+            'count': count,
+            # predictions are sorted, so the first member is the best match in the cell
+            'best_match': members[0]['name'],
+            'predicted_price': round(sum(prices) / count, 2),
+            'min_price': min(prices),
+            'max_price': max(prices),
+            'lifestyle_score': round(sum(m['lifestyle_score'] for m in members) / count, 2),
+            'combined_score': round(combined_score, 2),
+            'color': get_color_from_score(combined_score)
+        })
+    clusters.sort(key=lambda c: c['combined_score'], reverse=True)
+    return singles, clusters
+
+
+def parse_horizons(years_future):
+    """Return (horizons, is_trajectory) for a yearsFuture value or list of values"""
+    is_trajectory = isinstance(years_future, list)
+    values = years_future if is_trajectory else [years_future]
+    if not values or len(values) > MAX_HORIZONS:
+        raise ValueError(f'yearsFuture must list between 1 and {MAX_HORIZONS} horizons')
+    try:
+        horizons = [float(v) for v in values]
+    except (TypeError, ValueError):
+        raise ValueError('yearsFuture must be a number or a list of numbers')
+    if not all(math.isfinite(h) and 0 <= h <= MAX_YEARS_FUTURE for h in horizons):
+        raise ValueError(f'yearsFuture must be between 0 and {MAX_YEARS_FUTURE} years')
+    return [int(h) if h.is_integer() else h for h in horizons], is_trajectory
+
+
+def parse_appreciation_rates(rates):
+    """Validate an optional {borough: annual rate} table"""
+    if rates is None:
+        return {}
+    if not isinstance(rates, dict):
+        raise ValueError('appreciationRates must map borough names to annual rates')
+    try:
+        parsed = {borough: float(rate) for borough, rate in rates.items()}
+    except (TypeError, ValueError):
+        raise ValueError('appreciationRates values must be numbers')
+    if not all(math.isfinite(rate) and MIN_APPRECIATION_RATE < rate <= MAX_APPRECIATION_RATE
+               for rate in parsed.values()):
+        raise ValueError(f'appreciationRates values must be finite, above {MIN_APPRECIATION_RATE} '
+                         f'and at most {MAX_APPRECIATION_RATE}')
+    return parsed
+
 def calculate_affordability_score(predicted_price, budget):
     if budget == 0:
         return 0
@@ -252,18 +797,73 @@ def get_color_from_score(score):
 
 @app.route('/api/neighborhood/<name>', methods=['GET'])
 def get_neighborhood_details(name):
-    neighborhoods = get_nyc_neighborhoods()
-    neighborhood = next((n for n in neighborhoods if n['name'] == name), None)
+    neighborhood = catalog.get(name)
 
     if not neighborhood:
         return jsonify({'error': 'Neighborhood not found'}), 404
 
     ai_summary = generate_mock_summary(neighborhood)
+    review_summary = state_store.review_stats([name])[name]
 
-    return jsonify({
-        'neighborhood': neighborhood,
-        'ai_summary': ai_summary
-    }), 200
+    if wants_msgpack(request.accept_mimetypes):
+        return Response(packb({'neighborhood': neighborhood, 'ai_summary': ai_summary,
+                               'review_summary': review_summary}), mimetype=MSGPACK_MIMETYPE)
+    body = splice({'ai_summary': ai_summary, 'review_summary': review_summary},
+                  [('neighborhood', detail_fragments.get(neighborhood['id']))])
+    return Response(body, mimetype=JSON_MIMETYPE)
+
+
+@app.route('/api/neighborhoods/nearby', methods=['GET'])
+def get_nearby_neighborhoods():
+    """
+    Neighborhoods near a point, nearest first
+
+    Query params: lat, lng, and radius (miles) and/or k (result limit,
+    default 10 when no radius is given)
+    """
+    try:
+        lat = float(request.args['lat'])
+        lng = float(request.args['lng'])
+    except (KeyError, ValueError):
+        return jsonify({'error': 'lat and lng are required numbers'}), 400
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return jsonify({'error': 'lat/lng out of range'}), 400
+    radius = k = None
+    if 'radius' in request.args:
+        try:
+            radius = float(request.args['radius'])
+        except ValueError:
+            radius = -1.0
+        if not (math.isfinite(radius) and radius >= 0):
+            return jsonify({'error': 'radius must be a non-negative number of miles'}), 400
+    if 'k' in request.args:
+        try:
+            k = int(request.args['k'])
+        except ValueError:
+            k = 0
+        if k < 1:
+            return jsonify({'error': 'k must be a positive integer'}), 400
+
+    if radius is not None:
+        ids, distances = neighborhood_index.within_radius(lat, lng, radius)
+        if k is not None:
+            ids, distances = ids[:k], distances[:k]
+    else:
+        ids, distances = neighborhood_index.nearest(lat, lng, k or 10)
+
+    neighborhoods = catalog
+    results = [
+        {
+            'id': int(i),
+            'name': neighborhoods[i]['name'],
+            'borough': neighborhoods[i]['admin_area'],
+            'lat': neighborhoods[i]['lat'],
+            'lng': neighborhoods[i]['lng'],
+            'distance_miles': round(float(distance), 3)
+        }
+        for i, distance in zip(ids, distances)
+    ]
+    return jsonify({'neighborhoods': results}), 200
 
 
 # -------------------------------
@@ -272,16 +872,21 @@ def get_neighborhood_details(name):
 
 @app.route('/api/portfolio', methods=['GET'])
 def get_portfolio():
-    quiz_results = app_state.get('quiz_results')
+    quiz_results = sessions.get(session_id())
 
     if not quiz_results:
         return jsonify({'error': 'Complete the quiz to unlock your NYC portfolio'}), 400
 
-    neighborhoods = get_nyc_neighborhoods()
+    neighborhoods = catalog
+    try:
+        lifestyle_scores = score_neighborhoods(quiz_results, neighborhood_matrix)
+    except (TypeError, ValueError, KeyError) as e:
+        return jsonify({'error': f'Saved quiz results are invalid: {e}'}), 400
+
     compatibility = []
 
-    for neighborhood in neighborhoods:
-        lifestyle_score = calculate_compatibility_score(quiz_results, neighborhood)
+    for neighborhood, lifestyle_score in zip(neighborhoods, lifestyle_scores):
+        lifestyle_score = float(lifestyle_score)
         compatibility.append({
             'name': neighborhood['name'],
             'borough': neighborhood['admin_area'],
@@ -338,13 +943,46 @@ def generate_mock_summary(neighborhood):
     }
 
 
+REVIEWS_PAGE_SIZE = 20
+MAX_REVIEWS_PAGE_SIZE = 100
+
+
+def decode_review_cursor(cursor):
+    try:
+        date, review_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(date), int(review_id)
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError('cursor is invalid')
+
+
 @app.route('/api/neighborhood/<name>/reviews', methods=['GET'])
 def get_neighborhood_reviews(name):
     """
-    Get all reviews for a specific neighborhood
+    Reviews for a specific neighborhood, newest first, one page at a time
+
+    Query params: limit (page size, default 20, max 100) and cursor (the
+    next_cursor of the previous page). The response carries the
+    neighborhood's review_summary and, unless this is the last page, a
+    next_cursor.
     """
-    reviews = app_state.get('reviews', {}).get(name, [])
-    return jsonify({'reviews': reviews}), 200
+    try:
+        limit = int(request.args.get('limit', REVIEWS_PAGE_SIZE))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_REVIEWS_PAGE_SIZE:
+        return jsonify({'error': f'limit must be an integer between 1 and {MAX_REVIEWS_PAGE_SIZE}'}), 400
+    after = None
+    if request.args.get('cursor'):
+        try:
+            after = decode_review_cursor(request.args['cursor'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    reviews, next_after = state_store.get_reviews_page(name, limit, after)
+    response = {'reviews': reviews, 'review_summary': state_store.review_stats([name])[name]}
+    if next_after is not None:
+        response['next_cursor'] = encode_cursor(next_after)
+    return jsonify(response), 200
 
 @app.route('/api/neighborhood/<name>/reviews', methods=['POST'])
 def submit_neighborhood_review(name):
@@ -376,16 +1014,48 @@ def submit_neighborhood_review(name):
         'date': __import__('datetime').datetime.now().isoformat()
     }
 
-    if 'reviews' not in app_state:
-        app_state['reviews'] = {}
+    state_store.add_review(name, review)
 
-    if name not in app_state['reviews']:
-        app_state['reviews'][name] = []
+    return jsonify({'review': review, 'message': 'Review submitted successfully'}), 201
 
-    app_state['reviews'][name].insert(0, review)
-    save_app_state()
 
-    return jsonify({'review': review, 'message': 'Review submitted successfully'}), 201
+SEARCH_RESULTS = 20
+MAX_SEARCH_RESULTS = 100
+
+
+@app.route('/api/reviews/search', methods=['GET'])
+def search_reviews():
+    """
+    Full-text search over review comments, best match first
+
+    Query params: q (required), neighborhood and borough (repeatable;
+    both given means neighborhoods in those boroughs) and limit (default
+    20, max 100). Every word of q must appear; words are stemmed, so
+    "schools" also finds "school".
+    """
+    query = request.args.get('q', '')
+    try:
+        limit = int(request.args.get('limit', SEARCH_RESULTS))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_SEARCH_RESULTS:
+        return jsonify({'error': f'limit must be an integer between 1 and {MAX_SEARCH_RESULTS}'}), 400
+
+    names = None
+    if request.args.getlist('neighborhood'):
+        names = set(request.args.getlist('neighborhood'))
+    if request.args.getlist('borough'):
+        in_boroughs = {
+            str(catalog.names[row])
+            for borough in request.args.getlist('borough') for row in catalog.borough_rows(borough)
+        }
+        names = in_boroughs if names is None else names & in_boroughs
+
+    try:
+        results = state_store.search_reviews(query, names, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'query': query, 'results': results}), 200
 
 # -------------------------------
 
@@ -0,0 +1,77 @@
+"""
+Throughput benchmark for inline vs process-pool inference
+
+    python bench_inference.py --clients 8 --seconds 5
+
+Each client thread scores the full neighborhood batch in a loop, bypassing
+the cache and price grid, and the script reports batches per second for
+inline scoring and for pools of 1..N worker processes.
+"""
+import argparse
+import os
+import threading
+import time
+
+from inference_pool import InferencePool
+from model_predictor import LoadedModel, load_pipeline
+from neighborhood_data import get_nyc_neighborhoods
+
+
+def _rows():
+    return [
+        {
+            'TYPE': 'CONDO', 'BEDS': 2, 'BATH': 1, 'PROPERTYSQFT': 1000,
+            'ADMINISTRATIVE_AREA_LEVEL_2': n['admin_area'], 'LOCALITY': n['locality'],
+            'SUBLOCALITY': n['sublocality'], 'STREET_NAME': n['street_name'],
+            'LATITUDE': n['lat'], 'LONGITUDE': n['lng']
+        }
+        for n in get_nyc_neighborhoods()
+    ]
+
+
+def _throughput(run_batch, rows, clients, seconds):
+    done = [0] * clients
+    deadline = time.perf_counter() + seconds
+
+    def client(i):
+        while time.perf_counter() < deadline:
+            run_batch(rows, range(len(rows)))
+            done[i] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(done) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', default='models/advanced_house_price_model.joblib')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    rows = _rows()
+    locations = [{k: v for k, v in row.items() if k not in ('TYPE', 'BEDS', 'BATH', 'PROPERTYSQFT')}
+                 for row in rows]
+    loaded = LoadedModel(load_pipeline(args.model), args.model, locations=locations)
+
+    baseline = _throughput(loaded.run_model_batch, rows, args.clients, args.seconds)
+    print(f"inline          {baseline:8.1f} batches/s")
+
+    workers = 1
+    while workers <= args.max_workers:
+        pool = InferencePool(args.model, locations=locations, workers=workers,
+                             max_pending=args.clients, timeout=30.0)
+        rate = _throughput(pool.run_model_batch, rows, args.clients, args.seconds)
+        pool.shutdown(wait=True)
+        print(f"process x{workers:<3}    {rate:8.1f} batches/s  ({rate / baseline:.2f}x inline)")
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
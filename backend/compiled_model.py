@@ -0,0 +1,240 @@
+"""
+Pandas-free inference for the fitted sklearn pipeline
+
+compile_pipeline inspects a fitted Pipeline(ColumnTransformer, regressor)
+and exports its pieces into plain NumPy arrays: one-hot vocabularies,
+imputer and scaler parameters, and packed tree or linear parameters.
+CompiledPipeline then scores lists of input dicts directly, without
+building a DataFrame or going through sklearn's validation layers.
+"""
+import numpy as np
+
+
+class _CategoricalColumn:
+    def __init__(self, name, categories, offset):
+        self.name = name
+        self.offset = offset
+        self.width = len(categories)
+        self.index = {}
+        for i, category in enumerate(categories):
+            if isinstance(category, (float, np.floating)) and np.isnan(category):
+                continue
+            self.index[category.item() if isinstance(category, np.generic) else category] = i
+
+    def fill(self, X, rows):
+        hits, positions = [], []
+        for r, row in enumerate(rows):
+            try:
+                position = self.index.get(row.get(self.name))
+            except TypeError:
+                position = None
+            # Unknown categories encode as all zeros (handle_unknown='ignore')
+            if position is not None:
+                hits.append(r)
+                positions.append(self.offset + position)
+        X[hits, positions] = 1.0
+
+
+class _NumericColumn:
+    def __init__(self, name, position, fill_value, mean=0.0, scale=1.0):
+        self.name = name
+        self.position = position
+        self.fill_value = fill_value
+        self.mean = mean
+        self.scale = scale
+
+    def fill(self, X, rows):
+        # None becomes NaN, which is then imputed like sklearn's SimpleImputer
+        values = np.array([row.get(self.name) for row in rows], dtype=float)
+        if self.fill_value is not None:
+            values[np.isnan(values)] = self.fill_value
+        X[:, self.position] = (values - self.mean) / self.scale
+
+
+class _TreeEnsemble:
+    """All trees of an ensemble packed into flat node arrays"""
+
+    def __init__(self, trees, scale, offset, average=False):
+        node_offsets = np.cumsum([0] + [t.node_count for t in trees])[:-1]
+        self.roots = node_offsets.astype(np.intp)
+        self.feature = np.concatenate([t.feature for t in trees]).astype(np.intp)
+        self.threshold = np.concatenate([t.threshold for t in trees])
+        self.left = np.concatenate([np.where(t.children_left >= 0, t.children_left + o, -1)
+                                    for t, o in zip(trees, node_offsets)]).astype(np.intp)
+        self.right = np.concatenate([np.where(t.children_right >= 0, t.children_right + o, -1)
+                                     for t, o in zip(trees, node_offsets)]).astype(np.intp)
+        self.value = np.concatenate([t.value[:, 0, 0] for t in trees])
+        self.max_depth = max(t.max_depth for t in trees)
+        self.scale = scale
+        self.offset = offset
+        self.average = average
+
+    def predict(self, X):
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = X.astype(np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            internal = self.left[node] >= 0
+            if not internal.any():
+                break
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(internal, np.where(go_left, self.left[node], self.right[node]), node)
+        leaves = self.value[node]
+        total = leaves.mean(axis=1) if self.average else leaves.sum(axis=1)
+        return self.offset + self.scale * total
+
+
+class _Linear:
+    def __init__(self, coef, intercept):
+        self.coef = np.ravel(coef)
+        self.intercept = float(np.ravel(intercept)[0]) if np.ndim(intercept) else float(intercept)
+
+    def predict(self, X):
+        return X @ self.coef + self.intercept
+
+
+class CompiledPipeline:
+    def __init__(self, columns, n_features, estimator):
+        self.columns = columns
+        self.n_features = n_features
+        self.estimator = estimator
+
+    def transform(self, rows, columns=None, out=None):
+        """
+        Encode input dicts into the pipeline's feature matrix
+
+        Args:
+            rows: list of input dicts
+            columns: optional iterable of input column names to encode;
+                the rest of the matrix is left at zero
+            out: optional (len(rows), n_features) float matrix with other
+                columns already encoded; the selected columns are written into it
+
+        Returns:
+            np.ndarray: dense float64 matrix (len(rows), n_features)
+        """
+        X = np.zeros((len(rows), self.n_features)) if out is None else out
+        selected = None if columns is None else set(columns)
+        for column in self.columns:
+            if selected is None or column.name in selected:
+                column.fill(X, rows)
+        return X
+
+    def predict_matrix(self, X):
+        """Score an already encoded feature matrix"""
+        return self.estimator.predict(X)
+
+    def predict(self, rows):
+        """Score a list of input dicts"""
+        return self.predict_matrix(self.transform(rows))
+
+    def sample_rows(self, n=32):
+        """Synthetic rows covering the vocabularies, for parity checks and warmup"""
+        rows = [{} for _ in range(n)]
+        for column in self.columns:
+            if isinstance(column, _CategoricalColumn):
+                vocabulary = list(column.index)
+                for i, row in enumerate(rows):
+                    if vocabulary:
+                        row[column.name] = vocabulary[i % len(vocabulary)]
+            else:
+                base = column.fill_value if column.fill_value is not None else column.mean
+                for i, row in enumerate(rows):
+                    row[column.name] = float(base) * (0.5 + i / n)
+        return rows
+
+
+def _numeric_params(transformer):
+    """Collapse an imputer/scaler chain into (fill values, means, scales)"""
+    steps = transformer.steps if hasattr(transformer, 'steps') else [(None, transformer)]
+    fill, mean, scale = None, None, None
+    for _, step in steps:
+        name = type(step).__name__
+        if name == 'SimpleImputer':
+            if mean is not None:
+                raise ValueError('Imputer after scaler is not supported')
+            fill = np.asarray(step.statistics_, dtype=float)
+        elif name == 'StandardScaler':
+            mean = step.mean_ if step.with_mean else None
+            scale = step.scale_ if step.with_std else None
+        elif step != 'passthrough':
+            raise ValueError(f'Unsupported numeric transformer: {name}')
+    return fill, mean, scale
+
+
+def _compile_estimator(estimator):
+    name = type(estimator).__name__
+    if name == 'GradientBoostingRegressor':
+        if estimator.loss != 'squared_error':
+            raise ValueError(f'Unsupported boosting loss: {estimator.loss}')
+        init = estimator.init_
+        if init == 'zero':
+            offset = 0.0
+        elif type(init).__name__ == 'DummyRegressor':
+            offset = float(np.ravel(init.constant_)[0])
+        else:
+            raise ValueError(f'Unsupported boosting init: {type(init).__name__}')
+        trees = [e.tree_ for e in estimator.estimators_[:, 0]]
+        return _TreeEnsemble(trees, estimator.learning_rate, offset)
+    if name in ('RandomForestRegressor', 'ExtraTreesRegressor'):
+        return _TreeEnsemble([e.tree_ for e in estimator.estimators_], 1.0, 0.0, average=True)
+    if name == 'DecisionTreeRegressor':
+        return _TreeEnsemble([estimator.tree_], 1.0, 0.0)
+    if hasattr(estimator, 'coef_') and hasattr(estimator, 'intercept_'):
+        return _Linear(estimator.coef_, estimator.intercept_)
+    raise ValueError(f'Unsupported estimator: {name}')
+
+
+def compile_pipeline(pipeline):
+    """
+    Export a fitted Pipeline(ColumnTransformer, regressor) into NumPy arrays
+
+    Raises:
+        ValueError: if any step is not one this module knows how to compile
+    """
+    steps = getattr(pipeline, 'steps', None)
+    if not steps or len(steps) != 2:
+        raise ValueError('Expected a two-step preprocessor/regressor pipeline')
+    preprocessor, estimator = steps[0][1], steps[1][1]
+    if type(preprocessor).__name__ != 'ColumnTransformer':
+        raise ValueError('Expected a ColumnTransformer preprocessor')
+    if preprocessor.remainder != 'drop':
+        raise ValueError('ColumnTransformer remainder must be dropped')
+
+    columns = []
+    offset = 0
+    for _, transformer, names in preprocessor.transformers_:
+        if transformer == 'drop' or len(names) == 0:
+            continue
+        if type(transformer).__name__ == 'OneHotEncoder':
+            if transformer.drop is not None or getattr(transformer, '_infrequent_enabled', False):
+                raise ValueError('OneHotEncoder with drop or infrequent categories is not supported')
+            for name, categories in zip(names, transformer.categories_):
+                column = _CategoricalColumn(name, categories, offset)
+                columns.append(column)
+                offset += column.width
+        else:
+            if transformer == 'passthrough':
+                fill, mean, scale = None, None, None
+            else:
+                fill, mean, scale = _numeric_params(transformer)
+            for i, name in enumerate(names):
+                columns.append(_NumericColumn(
+                    name, offset,
+                    None if fill is None else fill[i],
+                    0.0 if mean is None else float(mean[i]),
+                    1.0 if scale is None else float(scale[i])
+                ))
+                offset += 1
+
+    return CompiledPipeline(columns, offset, _compile_estimator(estimator))
+
+
+def verify_parity(pipeline, compiled, rows, rtol=1e-6):
+    """Check that the compiled pipeline reproduces pipeline.predict on rows"""
+    import pandas as pd
+
+    expected = np.asarray(pipeline.predict(pd.DataFrame(rows)), dtype=float)
+    actual = compiled.predict(rows)
+    return np.allclose(actual, expected, rtol=rtol, atol=1e-6)
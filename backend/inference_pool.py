@@ -0,0 +1,115 @@
+"""
+Process-pool inference backend
+
+sklearn prediction and the compiled numpy engine both hold the GIL for
+much of their work, so a threaded Flask server serializes concurrent
+/api/predict calls. InferencePool sends model batches to worker
+processes that each load the model once at startup.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+_worker_model = None
+
+
+class InferenceUnavailable(RuntimeError):
+    """Raised when the pool cannot take or finish a batch in time"""
+
+
+def _init_worker(model_path, version, locations, grid_path):
+    global _worker_model
+    from model_predictor import LoadedModel, load_pipeline
+
+    _worker_model = LoadedModel(load_pipeline(model_path), model_path, version, locations, grid_path)
+
+
+def _worker_ready():
+    return _worker_model is not None
+
+
+def _run_in_worker(input_list, location_ids):
+    return _worker_model.run_model_batch(input_list, location_ids)
+
+
+def _mp_context():
+    # The pool is started from a background thread of a threaded server, and
+    # forking while other threads hold locks (logging, sqlite, BLAS pools) can
+    # deadlock the child, so plain fork is only used when asked for explicitly
+    methods = multiprocessing.get_all_start_methods()
+    method = os.getenv('INFERENCE_START_METHOD') or ('forkserver' if 'forkserver' in methods else 'spawn')
+    context = multiprocessing.get_context(method)
+    if method == 'forkserver':
+        # Import the model stack once in the single-threaded fork server, not in every worker
+        context.set_forkserver_preload(['model_predictor'])
+    return context
+
+
+class InferencePool:
+    mode = 'process'
+
+    def __init__(self, model_path, version=None, locations=None, grid_path=None,
+                 workers=None, max_pending=None, timeout=5.0):
+        """
+        Start worker processes with the model preloaded
+
+        Args:
+            model_path, version, locations, grid_path: as for LoadedModel
+            workers: number of processes (default: CPU count)
+            max_pending: batches allowed in flight or queued before new ones
+                are rejected (default: 2 per worker)
+            timeout: seconds a caller waits for a queue slot and for its result
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 2
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=_mp_context(),
+            initializer=_init_worker,
+            initargs=(model_path, version, list(locations or []), grid_path)
+        )
+        # Make every worker load the model now rather than on the first user request
+        ready = [self._executor.submit(_worker_ready) for _ in range(self.workers)]
+        for future in ready:
+            future.result()
+
+    def run_model_batch(self, input_list, location_ids=None):
+        """
+        Score a batch in a worker process
+
+        Raises:
+            InferenceUnavailable: if the queue is full or the batch times out
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise InferenceUnavailable('Inference queue is full')
+        try:
+            future = self._executor.submit(
+                _run_in_worker, input_list, None if location_ids is None else list(location_ids)
+            )
+        except Exception:
+            self._slots.release()
+            raise
+        # Free the slot when the worker finishes, even if this caller gave up waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise InferenceUnavailable(f'Inference timed out after {self.timeout}s')
+
+    def stats(self):
+        """Pool configuration, for readiness checks"""
+        return {
+            'mode': self.mode,
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'timeout': self.timeout
+        }
+
+    def shutdown(self, wait=False):
+        """Stop the workers once the batches already submitted have finished"""
+        self._executor.shutdown(wait=wait)
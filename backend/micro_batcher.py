@@ -0,0 +1,147 @@
+"""
+Cross-request micro-batching for model inference
+
+Concurrent requests each hand MicroBatcher a small batch of rows. A single
+worker thread collects them for up to max_wait_ms (or until max_batch_rows
+is reached), scores the combined matrix with one model call and hands each
+caller back its own slice. A larger wait gives bigger batches and more
+throughput at the cost of added latency.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+from inference_pool import InferenceUnavailable
+
+
+class _Request:
+    __slots__ = ('rows', 'location_ids', 'future', 'enqueued_at')
+
+    def __init__(self, rows, location_ids):
+        self.rows = rows
+        self.location_ids = location_ids
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    mode = 'batched'
+
+    def __init__(self, run_batch, max_batch_rows=1024, max_wait_ms=5.0, timeout=5.0):
+        """
+        Args:
+            run_batch: callable(rows, location_ids) -> np.ndarray of prices
+            max_batch_rows: flush as soon as this many rows are waiting
+            max_wait_ms: longest a request waits for others to join its batch
+            timeout: seconds a caller waits for its result
+        """
+        self.run_batch = run_batch
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._rows = 0
+        self._requests = 0
+        self._max_batch = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._thread = threading.Thread(target=self._loop, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def run_model_batch(self, input_list, location_ids=None):
+        """
+        Queue rows for the next combined model call and wait for their prices
+
+        Raises:
+            InferenceUnavailable: if the result does not arrive within timeout
+        """
+        request = _Request(input_list, None if location_ids is None else list(location_ids))
+        self._queue.put(request)
+        try:
+            return request.future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise InferenceUnavailable(f'Batched inference timed out after {self.timeout}s')
+
+    def _collect(self, first):
+        batch = [first]
+        rows = len(first.rows)
+        deadline = first.enqueued_at + self.max_wait
+        while rows < self.max_batch_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)
+                break
+            batch.append(request)
+            rows += len(request.rows)
+        return batch
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            started = time.perf_counter()
+
+            rows = [row for request in batch for row in request.rows]
+            # Cached location blocks are only usable when every caller supplied ids
+            if all(request.location_ids is not None for request in batch):
+                location_ids = [i for request in batch for i in request.location_ids]
+            else:
+                location_ids = None
+
+            try:
+                prices = np.asarray(self.run_batch(rows, location_ids))
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            offset = 0
+            for request in batch:
+                request.future.set_result(prices[offset:offset + len(request.rows)])
+                offset += len(request.rows)
+            self._record(batch, len(rows), started)
+
+    def _record(self, batch, rows, started):
+        waits = [started - request.enqueued_at for request in batch]
+        with self._stats_lock:
+            self._batches += 1
+            self._requests += len(batch)
+            self._rows += rows
+            self._max_batch = max(self._max_batch, rows)
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+
+    def stats(self):
+        """Batch-size and queue-wait metrics since startup"""
+        with self._stats_lock:
+            return {
+                'mode': self.mode,
+                'max_wait_ms': self.max_wait * 1000,
+                'max_batch_rows': self.max_batch_rows,
+                'batches': self._batches,
+                'requests': self._requests,
+                'mean_batch_rows': round(self._rows / self._batches, 2) if self._batches else 0.0,
+                'max_batch_rows_seen': self._max_batch,
+                'mean_queue_wait_ms': round(self._wait_total / self._requests * 1000, 3) if self._requests else 0.0,
+                'max_queue_wait_ms': round(self._wait_max * 1000, 3)
+            }
+
+    def shutdown(self, wait=False):
+        """Stop the worker after the requests already queued are served"""
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
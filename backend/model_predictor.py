@@ -2,7 +2,35 @@ import importlib
 import joblib
 import pandas as pd
 import numpy as np
+import multiprocessing
 import os
+import threading
+
+from compiled_model import compile_pipeline, verify_parity
+from inference_pool import InferencePool
+from micro_batcher import MicroBatcher
+from prediction_cache import PredictionCache
+from price_grid import DEFAULT_GRID_PATH, LOCATION_COLUMNS, PriceGrid, model_fingerprint
+
+FEATURE_COLUMNS = (
+    'TYPE', 'BEDS', 'BATH', 'PROPERTYSQFT',
+    'ADMINISTRATIVE_AREA_LEVEL_2', 'LOCALITY', 'SUBLOCALITY', 'STREET_NAME',
+    'LATITUDE', 'LONGITUDE'
+)
+VARYING_COLUMNS = tuple(c for c in FEATURE_COLUMNS if c not in LOCATION_COLUMNS)
+
+# How long a replaced model's worker pool or batcher stays up for in-flight requests
+BACKEND_RETIRE_SECONDS = 30
+
+# Used for warmup and validation when no neighborhood locations were provided
+DEFAULT_LOCATION = {
+    'ADMINISTRATIVE_AREA_LEVEL_2': 'New York County',
+    'LOCALITY': 'New York',
+    'SUBLOCALITY': 'Manhattan',
+    'STREET_NAME': 'Broadway',
+    'LATITUDE': 40.7831,
+    'LONGITUDE': -73.9712
+}
 
 
 def _register_bitgenerator(alias) -> bool:
@@ -62,38 +90,391 @@ if _np_random_pickle is not None:
 
     _np_random_pickle.__bit_generator_ctor = _patched_bit_generator_ctor
 
+
+def _normalize_feature(value):
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def _cache_key(input_data):
+    """Build a hashable key from the model features of an input dict"""
+    return tuple(_normalize_feature(input_data.get(column)) for column in FEATURE_COLUMNS)
+
+
+def _raw_location_key(input_data):
+    return tuple(input_data.get(column) for column in LOCATION_COLUMNS)
+
+
+def load_pipeline(model_path):
+    """Load a joblib pipeline, retrying once through the BitGenerator shim"""
+    try:
+        return joblib.load(model_path)
+    except ValueError as e:
+        # Handle legacy numpy bit generator aliases emitted by older sklearn toolchains
+        if 'BitGenerator' not in str(e):
+            raise
+        alias = str(e).split(' is not a known BitGenerator', 1)[0]
+        if not _register_bitgenerator(alias):
+            raise
+        model = joblib.load(model_path)
+        print("Model loaded successfully after BitGenerator shim!")
+        return model
+
+
+class LoadedModel:
+    """
+    One model file plus everything derived from it: the compiled engine,
+    the encoded location blocks, the price grid and the base price cache.
+    HousingPredictor swaps these in as a unit, so a request that picked up
+    one LoadedModel finishes on it even if a new version goes live meanwhile.
+    """
+
+    def __init__(self, model, model_path=None, version=None, locations=None, grid_path=None,
+                 backend=None):
+        self.model = model
+        self.model_path = model_path
+        self.version = version
+        self.grid_path = grid_path
+        # Optional InferencePool or MicroBatcher that cache misses are sent to
+        self.backend = backend
+        self.compiled = None
+        self.location_matrix = None
+        self.location_index = {}
+        self.price_grid = None
+        self.cache = PredictionCache(
+            max_size=int(os.getenv('PREDICTION_CACHE_SIZE', 10000)),
+            ttl_seconds=float(os.getenv('PREDICTION_CACHE_TTL', 3600))
+        )
+        if model is not None:
+            self._compile()
+            self._encode_locations(locations or [])
+            self._load_price_grid(grid_path)
+
+    @property
+    def inference_mode(self):
+        return getattr(self.backend, 'mode', 'inline')
+
+    @property
+    def engine(self):
+        if self.model is None:
+            return 'fallback'
+        return 'compiled' if self.compiled is not None else 'sklearn'
+
+    def _compile(self):
+        """Export the pipeline to the pandas-free engine if it reproduces model.predict"""
+        try:
+            compiled = compile_pipeline(self.model)
+            if verify_parity(self.model, compiled, compiled.sample_rows()):
+                self.compiled = compiled
+                print("Compiled numpy inference engine enabled")
+            else:
+                print("Compiled engine does not match model.predict; using sklearn pipeline")
+        except Exception as e:
+            print(f"Could not compile model pipeline, using sklearn pipeline: {e}")
+            self.compiled = None
+
+    def _encode_locations(self, locations):
+        """Encode the fixed location columns of every known neighborhood once"""
+        if self.compiled is None or not locations:
+            return
+        self.location_matrix = self.compiled.transform(locations, columns=LOCATION_COLUMNS)
+        self.location_index = {
+            _raw_location_key(location): i for i, location in enumerate(locations)
+        }
+
+    def _load_price_grid(self, grid_path):
+        """Memory-map the precomputed price grid if one was built for this model"""
+        if not grid_path:
+            return
+        try:
+            self.price_grid = PriceGrid.load(grid_path, model_fingerprint(self.model_path))
+        except Exception as e:
+            print(f"Error loading price grid: {e}")
+            self.price_grid = None
+        if self.price_grid is not None:
+            print(f"Price grid loaded from {grid_path}")
+
+    def encode_batch(self, input_list, location_ids=None):
+        """Join cached location blocks with freshly encoded user-varying columns"""
+        if self.location_matrix is None:
+            return self.compiled.transform(input_list)
+        if location_ids is not None:
+            positions = location_ids
+        else:
+            positions = [self.location_index.get(_raw_location_key(row), -1) for row in input_list]
+        if -1 in positions:
+            return self.compiled.transform(input_list)
+        X = self.location_matrix[positions]
+        return self.compiled.transform(input_list, columns=VARYING_COLUMNS, out=X)
+
+    def predict_base_batch(self, input_list, location_ids=None):
+        """Answer from the price grid and cache, running the model once over the misses"""
+        if self.price_grid is not None:
+            base_prices = self.price_grid.lookup_batch(input_list)
+        else:
+            base_prices = np.full(len(input_list), np.nan)
+
+        keys = {}
+        missing = []
+        for i in np.flatnonzero(np.isnan(base_prices)):
+            keys[i] = _cache_key(input_list[i])
+            cached = self.cache.get(keys[i])
+            if cached is None:
+                missing.append(i)
+            else:
+                base_prices[i] = cached
+
+        if missing:
+            # Pool workers and the micro-batcher end up in run_model_batch as well
+            run_batch = self.backend.run_model_batch if self.backend is not None else self.run_model_batch
+            computed = run_batch(
+                [input_list[i] for i in missing],
+                None if location_ids is None else [location_ids[i] for i in missing]
+            )
+            base_prices[missing] = computed
+            for i, price in zip(missing, computed):
+                if not np.isnan(price):
+                    self.cache.set(keys[i], float(price))
+
+        return base_prices
+
+    def run_model_batch(self, input_list, location_ids=None):
+        """Run the model once over all rows, isolating per-row failures"""
+        if self.compiled is not None:
+            try:
+                X = self.encode_batch(input_list, location_ids)
+                return self.compiled.predict_matrix(X)
+            except Exception as e:
+                print(f"Compiled prediction failed, falling back to sklearn pipeline: {e}")
+
+        try:
+            df = pd.DataFrame(input_list)
+            return np.asarray(self.model.predict(df), dtype=float)
+        except Exception as e:
+            print(f"Batch prediction failed, retrying row by row: {e}")
+
+        # One bad row should not drop the whole batch
+        base_prices = np.full(len(input_list), np.nan)
+        for i, input_data in enumerate(input_list):
+            try:
+                base_prices[i] = self.model.predict(pd.DataFrame([input_data]))[0]
+            except Exception as e:
+                print(f"Error predicting row {i}: {e}")
+        return base_prices
+
+    def warmup(self, rows):
+        """Run a synthetic batch through every inference path so first requests skip cold costs"""
+        if self.model is None:
+            return
+        # Bypass the cache so warmup does not count as hits or fill it with synthetic rows
+        self.run_model_batch(rows)
+        self.model.predict(pd.DataFrame(rows[:1]))
+        if self.price_grid is not None:
+            self.price_grid.lookup_batch(rows)
+        print(f"Model warmed up on {len(rows)} synthetic rows")
+
+    def validate(self, rows):
+        """
+        Smoke-test the model before it serves traffic
+
+        Raises:
+            ValueError: if any synthetic row fails, or prices are not broadly positive
+        """
+        prices = self.run_model_batch(rows)
+        # Tree ensembles can dip below zero for odd inputs, so only the median must be positive
+        if len(prices) != len(rows) or not np.all(np.isfinite(prices)) or np.median(prices) <= 0:
+            raise ValueError(f"Model {self.version or self.model_path} failed validation on smoke batch")
+
+
 class HousingPredictor:
-    def __init__(self, model_path='models/advanced_house_price_model.joblib'):
+    def __init__(self, model_path='models/advanced_house_price_model.joblib', locations=None,
+                 load_async=False, version=None, grid_path=None, inference_mode=None):
         """
         Initialize the housing price predictor
+
+        Args:
+            model_path: path to the joblib pipeline
+            locations: optional list of dicts with the LOCATION_COLUMNS of every
+                known neighborhood; their encoded features are cached at load
+            load_async: load and warm up the model on a background thread;
+                is_ready() reports when it has finished
+            version: optional label for the model, reported in status()
+            grid_path: price grid for this model (defaults to PRICE_GRID_PATH)
+            inference_mode: 'inline' (default) scores in the calling thread;
+                'process' sends batches to an InferencePool of worker processes
+                (INFERENCE_WORKERS, INFERENCE_MAX_PENDING, INFERENCE_TIMEOUT);
+                'batched' merges concurrent requests into one model call
+                (MICRO_BATCH_WAIT_MS, MICRO_BATCH_MAX_ROWS)
         """
         self.model_path = model_path
-        self.model = None
-        self.load_model()
+        self.inference_mode = inference_mode or os.getenv('INFERENCE_MODE', 'inline')
+        self.version = version
+        self.grid_path = grid_path or os.getenv('PRICE_GRID_PATH', DEFAULT_GRID_PATH)
+        self.locations = list(locations or [])
+        self._active = LoadedModel(None, model_path, version)
+        self._swap_lock = threading.Lock()
+        # Held for a whole load so model_path, version, grid_path and the
+        # serving LoadedModel always describe the same model
+        self._load_lock = threading.Lock()
+        self._ready = threading.Event()
+        if load_async:
+            threading.Thread(target=self._load_and_warm, name='model-loader', daemon=True).start()
+        else:
+            self._load_and_warm()
+
+    # The serving model is read through _active so a hot swap replaces it in one step
+    @property
+    def model(self):
+        return self._active.model
+
+    @property
+    def compiled(self):
+        return self._active.compiled
+
+    @property
+    def price_grid(self):
+        return self._active.price_grid
+
+    @property
+    def cache(self):
+        return self._active.cache
+
+    def active_model(self):
+        """The LoadedModel serving right now; pass it to predict_batch to pin a request to it"""
+        return self._active
+
+    def _load_and_warm(self):
+        try:
+            self.load_model()
+            self.warmup()
+        except Exception as e:
+            print(f"Error preparing model: {e}")
+        finally:
+            self._ready.set()
+
+    def is_ready(self):
+        """True once the model has been loaded (or found missing) and warmed up"""
+        return self._ready.is_set()
+
+    def wait_until_ready(self, timeout=None):
+        """Block until is_ready() or timeout seconds pass; returns is_ready()"""
+        return self._ready.wait(timeout)
+
+    def _synthetic_rows(self):
+        rows = []
+        for i, location in enumerate(self.locations or [DEFAULT_LOCATION]):
+            rows.append({
+                'TYPE': 'CONDO',
+                'BEDS': 1 + i % 3,
+                'BATH': 1 + i % 2,
+                'PROPERTYSQFT': 800 + 100 * (i % 8),
+                **location
+            })
+        return rows
+
+    def warmup(self):
+        """Run a synthetic batch through the serving model"""
+        self._active.warmup(self._synthetic_rows())
+
+    def status(self):
+        """Snapshot of what the predictor is serving from, for readiness checks"""
+        active = self._active
+        return {
+            'ready': self.is_ready(),
+            'model_loaded': active.model is not None,
+            'model_version': active.version,
+            'engine': active.engine,
+            'inference_mode': active.inference_mode,
+            'inference': active.backend.stats() if active.backend is not None else None,
+            'price_grid': active.price_grid is not None,
+            'cache': active.cache.stats()
+        }
 
     def load_model(self):
         """Load the pre-trained model"""
-        if os.path.exists(self.model_path):
-            try:
-                self.model = joblib.load(self.model_path)
-                print("Model loaded successfully!")
-            except Exception as e:
-                # Handle legacy numpy bit generator aliases emitted by older sklearn toolchains
-                if isinstance(e, ValueError) and 'BitGenerator' in str(e):
-                    alias = str(e).split(' is not a known BitGenerator', 1)[0]
-                    if _register_bitgenerator(alias):
-                        try:
-                            self.model = joblib.load(self.model_path)
-                            print("Model loaded successfully after BitGenerator shim!")
-                            return
-                        except Exception as retry_err:
-                            print(f"Retry failed when loading model: {retry_err}")
-                print(f"Error loading model: {e}")
-                self.model = None
-        else:
-            print(f"Model file not found at {self.model_path}")
-            print("Using fallback prediction method")
-            self.model = None
+        with self._load_lock:
+            model = None
+            if os.path.exists(self.model_path):
+                try:
+                    model = load_pipeline(self.model_path)
+                    print("Model loaded successfully!")
+                except Exception as e:
+                    print(f"Error loading model: {e}")
+            else:
+                print(f"Model file not found at {self.model_path}")
+                print("Using fallback prediction method")
+            # Cached base prices, the lookup grid and the compiled engine all belong
+            # to the model they were built from, so they are replaced together
+            loaded = LoadedModel(model, self.model_path, self.version, self.locations, self.grid_path)
+            loaded.backend = self._start_backend(loaded)
+            self._swap(loaded)
+
+    def _start_backend(self, loaded):
+        """Build the InferencePool or MicroBatcher that inference_mode asks for"""
+        if loaded.model is None:
+            return None
+        timeout = float(os.getenv('INFERENCE_TIMEOUT', 5.0))
+        if self.inference_mode == 'batched':
+            return MicroBatcher(
+                loaded.run_model_batch,
+                max_batch_rows=int(os.getenv('MICRO_BATCH_MAX_ROWS', 1024)),
+                max_wait_ms=float(os.getenv('MICRO_BATCH_WAIT_MS', 5.0)),
+                timeout=timeout
+            )
+        # Never start a pool from inside a pool worker that imported this module
+        if self.inference_mode != 'process' or multiprocessing.parent_process():
+            return None
+        model_path, version, grid_path = loaded.model_path, loaded.version, loaded.grid_path
+        try:
+            pool = InferencePool(
+                model_path, version, self.locations, grid_path,
+                workers=int(os.getenv('INFERENCE_WORKERS', 0)) or None,
+                max_pending=int(os.getenv('INFERENCE_MAX_PENDING', 0)) or None,
+                timeout=timeout
+            )
+        except Exception as e:
+            print(f"Could not start inference pool, scoring inline: {e}")
+            return None
+        print(f"Inference pool started with {pool.workers} worker processes")
+        return pool
+
+    def _swap(self, loaded_model):
+        with self._swap_lock:
+            previous, self._active = self._active, loaded_model
+        if previous.backend is not None:
+            # Requests pinned to the previous model may still be using its backend
+            retire = threading.Timer(BACKEND_RETIRE_SECONDS, previous.backend.shutdown)
+            retire.daemon = True
+            retire.start()
+
+    def load_version(self, model_path, version=None, grid_path=None):
+        """
+        Load, validate and warm a new model off to the side, then swap it in atomically
+
+        Requests already running keep the LoadedModel they started with.
+        Concurrent calls load one at a time, in the order they take the lock.
+
+        Raises:
+            Exception: if the model cannot be loaded or fails validation; the
+                current model stays active
+        """
+        with self._load_lock:
+            grid_path = grid_path or self.grid_path
+            model = load_pipeline(model_path)
+            candidate = LoadedModel(model, model_path, version, self.locations, grid_path)
+            rows = self._synthetic_rows()
+            candidate.validate(rows)
+            candidate.warmup(rows)
+            candidate.backend = self._start_backend(candidate)
+            self._swap(candidate)
+            self.model_path = model_path
+            self.version = version
+            self.grid_path = grid_path
+        print(f"Model version {version or model_path} is now active")
+        return candidate
 
     def predict(self, input_data, years_future=0, appreciation_rate=0.05):
         """
@@ -117,10 +498,26 @@ class HousingPredictor:
         Returns:
             float: predicted price
         """
-        if self.model is not None:
-            # Use actual ML model
-            df = pd.DataFrame([input_data])
-            base_price = self.model.predict(df)[0]
+        active = self._active
+        if active.model is not None:
+            # Answer from the precomputed grid when possible, then from the
+            # cache, and only run the model for inputs seen for the first time
+            key = _cache_key(input_data)
+            base_price = None
+            if active.price_grid is not None:
+                grid_price = active.price_grid.lookup_batch([input_data])[0]
+                if not np.isnan(grid_price):
+                    base_price = float(grid_price)
+            if base_price is None:
+                base_price = active.cache.get(key)
+            if base_price is None:
+                if active.compiled is not None:
+                    X = active.encode_batch([input_data])
+                    base_price = float(active.compiled.predict_matrix(X)[0])
+                else:
+                    df = pd.DataFrame([input_data])
+                    base_price = float(active.model.predict(df)[0])
+                active.cache.set(key, base_price)
         else:
             # Fallback: simple heuristic for hackathon demo
             base_price = self._fallback_prediction(input_data)
@@ -164,12 +561,54 @@ class HousingPredictor:
 
         return base_price
 
-    def predict_batch(self, input_list, years_future=0):
+    def predict_batch(self, input_list, years_future=0, appreciation_rate=0.05, location_ids=None,
+                      active_model=None):
         """
-        Predict prices for multiple properties
+        Predict prices for multiple properties with a single model pass
+
+        Args:
+            input_list: list of input dicts (same keys as predict)
+            years_future: int, number of years in the future
+            appreciation_rate: float, annual appreciation rate (default 5%)
+            location_ids: optional list of indexes into self.locations, one per
+                row, so the cached location encoding is used without a lookup
+            active_model: optional LoadedModel from active_model() to score with
+
+        Returns:
+            np.ndarray: predicted prices, NaN for rows that could not be scored
         """
-        predictions = []
-        for input_data in input_list:
-            pred = self.predict(input_data, years_future)
-            predictions.append(pred)
-        return predictions
+        trajectories = self.predict_trajectories(
+            input_list, [years_future], appreciation_rate, location_ids, active_model
+        )
+        return trajectories[:, 0]
+
+    def predict_trajectories(self, input_list, horizons, appreciation_rates=0.05, location_ids=None,
+                             active_model=None):
+        """
+        Predict prices for multiple properties at several horizons from one base price each
+
+        Args:
+            input_list: list of input dicts (same keys as predict)
+            horizons: sequence of years in the future, e.g. range(11)
+            appreciation_rates: float, or one annual rate per row
+            location_ids: see predict_batch
+            active_model: see predict_batch
+
+        Returns:
+            np.ndarray: (len(input_list), len(horizons)) prices, NaN rows where scoring failed
+        """
+        horizons = np.asarray(horizons, dtype=float)
+        if not input_list:
+            return np.empty((0, len(horizons)))
+
+        base_prices = self._predict_base_batch(input_list, location_ids, active_model)
+
+        # Appreciation for every row and horizon in one broadcast
+        rates = np.broadcast_to(np.asarray(appreciation_rates, dtype=float), base_prices.shape)
+        return base_prices[:, None] * (1 + rates[:, None]) ** horizons[None, :]
+
+    def _predict_base_batch(self, input_list, location_ids=None, active_model=None):
+        active = active_model or self._active
+        if active.model is None:
+            return np.array([self._fallback_prediction(row) for row in input_list], dtype=float)
+        return active.predict_base_batch(input_list, location_ids)
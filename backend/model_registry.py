@@ -0,0 +1,181 @@
+"""
+Versioned model registry
+
+Layout under the registry root:
+
+    <root>/<version>/model.joblib      trained pipeline
+    <root>/<version>/metadata.json     free-form metadata (metrics, trained_at, ...)
+    <root>/<version>/price_grid.npy    optional grid built with price_grid.py
+    <root>/ACTIVE                      name of the version to serve
+
+Publish and activate versions with
+
+    python model_registry.py publish path/to/model.joblib --version 2025-11-20
+    python model_registry.py activate 2025-11-20
+
+A running server picks up a changed ACTIVE file through watch(), or an
+admin can trigger the switch through the API.
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+MODEL_FILENAME = 'model.joblib'
+METADATA_FILENAME = 'metadata.json'
+GRID_FILENAME = 'price_grid.npy'
+ACTIVE_FILENAME = 'ACTIVE'
+
+
+class ModelRegistry:
+    def __init__(self, root='models/registry'):
+        self.root = root
+
+    def _version_dir(self, version):
+        if not version or os.sep in version or version.startswith('.'):
+            raise ValueError(f"Invalid model version: {version!r}")
+        return os.path.join(self.root, version)
+
+    def list_versions(self):
+        """Return metadata for every published version, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        versions = []
+        for name in sorted(os.listdir(self.root)):
+            if os.path.exists(os.path.join(self.root, name, MODEL_FILENAME)):
+                versions.append(self.get(name))
+        return versions
+
+    def get(self, version):
+        """
+        Describe one published version
+
+        Raises:
+            KeyError: if the version has no model file
+        """
+        version_dir = self._version_dir(version)
+        model_path = os.path.join(version_dir, MODEL_FILENAME)
+        if not os.path.exists(model_path):
+            raise KeyError(version)
+        metadata = {}
+        metadata_path = os.path.join(version_dir, METADATA_FILENAME)
+        if os.path.exists(metadata_path):
+            with open(metadata_path, 'r') as f:
+                metadata = json.load(f)
+        return {
+            'version': version,
+            'model_path': model_path,
+            'grid_path': os.path.join(version_dir, GRID_FILENAME),
+            'metadata': metadata
+        }
+
+    def active_version(self):
+        """Name of the version marked active, or None"""
+        try:
+            with open(os.path.join(self.root, ACTIVE_FILENAME), 'r') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def active(self):
+        """Describe the active version, or None if nothing usable is marked active"""
+        version = self.active_version()
+        if version is None:
+            return None
+        try:
+            return self.get(version)
+        except (KeyError, ValueError):
+            print(f"Active model version {version!r} is not in the registry")
+            return None
+
+    def set_active(self, version):
+        """Mark a published version active, replacing the pointer file atomically"""
+        self.get(version)
+        os.makedirs(self.root, exist_ok=True)
+        pointer = os.path.join(self.root, ACTIVE_FILENAME)
+        tmp_path = pointer + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, pointer)
+
+    def publish(self, source_path, version, metadata=None):
+        """Copy a trained model into the registry under a new version"""
+        version_dir = self._version_dir(version)
+        if os.path.exists(version_dir):
+            raise ValueError(f"Model version {version!r} already exists")
+        os.makedirs(version_dir)
+        shutil.copy2(source_path, os.path.join(version_dir, MODEL_FILENAME))
+        metadata = dict(metadata or {})
+        metadata.setdefault('published_at', datetime.now().isoformat())
+        metadata.setdefault('source', os.path.abspath(source_path))
+        with open(os.path.join(version_dir, METADATA_FILENAME), 'w') as f:
+            json.dump(metadata, f, indent=2)
+        return self.get(version)
+
+    def watch(self, on_change, current_version, interval=10.0):
+        """
+        Poll the ACTIVE pointer and call on_change(entry) when it names a
+        version other than current_version()
+
+        Runs on a daemon thread; returns the thread. A version that fails to
+        load is not retried until the pointer moves again.
+        """
+        def poll():
+            failed = None
+            while True:
+                time.sleep(interval)
+                version = self.active_version()
+                if not version or version == current_version() or version == failed:
+                    continue
+                entry = self.active()
+                if entry is None:
+                    continue
+                try:
+                    on_change(entry)
+                    failed = None
+                except Exception as e:
+                    print(f"Failed to switch to model version {version}: {e}")
+                    failed = version
+
+        thread = threading.Thread(target=poll, name='model-registry-watch', daemon=True)
+        thread.start()
+        return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage versioned price models')
+    parser.add_argument('--root', default=os.getenv('MODEL_REGISTRY_DIR', 'models/registry'))
+    commands = parser.add_subparsers(dest='command', required=True)
+    publish = commands.add_parser('publish', help='copy a trained model into the registry')
+    publish.add_argument('model_path')
+    publish.add_argument('--version', required=True)
+    publish.add_argument('--activate', action='store_true')
+    activate = commands.add_parser('activate', help='mark a published version active')
+    activate.add_argument('version')
+    commands.add_parser('list', help='list published versions')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'publish':
+        entry = registry.publish(args.model_path, args.version)
+        print(f"Published {entry['version']} to {entry['model_path']}")
+        if args.activate:
+            registry.set_active(args.version)
+            print(f"Activated {args.version}")
+    elif args.command == 'activate':
+        registry.set_active(args.version)
+        print(f"Activated {args.version}")
+    else:
+        active = registry.active_version()
+        for entry in registry.list_versions():
+            marker = '*' if entry['version'] == active else ' '
+            print(f"{marker} {entry['version']}  {entry['metadata'].get('published_at', '')}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+"""
+Columnar, memory-mapped neighborhood store
+
+Layout of a store directory:
+
+    <dir>/manifest.json            row count and the column list with kinds
+    <dir>/<column>.npy             one array per attribute (int64, float64 or
+                                   fixed-width unicode)
+    <dir>/<column>.present.npy     bool mask, only for columns with gaps
+
+Columns are memory-mapped, so opening a store costs the same for 68 rows or
+68,000 and pages are shared between worker processes. The store in
+backend/catalog is committed and is the neighborhood data's source of
+truth. To edit it, export it to JSON, change the records and rebuild:
+
+    python neighborhood_store.py export --output neighborhoods.json
+    python neighborhood_store.py build neighborhoods.json --output catalog
+"""
+import argparse
+import json
+import os
+from collections.abc import Mapping
+from datetime import datetime
+
+import numpy as np
+
+DEFAULT_STORE_DIR = 'catalog'
+MANIFEST_FILENAME = 'manifest.json'
+FORMAT_VERSION = 2
+# Format 1 also saved a sorted name index, which readers now ignore
+READABLE_FORMATS = (1, FORMAT_VERSION)
+
+
+def _column_kind(values):
+    kinds = {type(v) for v in values}
+    if kinds <= {int}:
+        return 'int'
+    if kinds <= {int, float}:
+        return 'float'
+    if kinds <= {str}:
+        return 'str'
+    raise ValueError(f"Unsupported column types: {sorted(k.__name__ for k in kinds)}")
+
+
+class NeighborhoodStore:
+    def __init__(self, columns, kinds, present=None):
+        """
+        Args:
+            columns: {name: array}, all the same length, in record key order
+            kinds: {name: 'int' | 'float' | 'str'}
+            present: {name: bool array} for columns where some rows have no value
+        """
+        self.columns = columns
+        self.kinds = kinds
+        self.present = present or {}
+        self.size = len(columns['name'])
+        # Built once at load; the first row wins if a name repeats
+        self.rows_by_name = {}
+        for row, name in enumerate(columns['name'].tolist()):
+            self.rows_by_name.setdefault(name, row)
+
+    @classmethod
+    def from_records(cls, records):
+        """Convert a list of neighborhood dicts into in-memory columns"""
+        keys = []
+        for record in records:
+            keys.extend(key for key in record if key not in keys)
+        columns, kinds, present = {}, {}, {}
+        for key in keys:
+            mask = np.array([key in record for record in records], dtype=bool)
+            values = [record[key] for record in records if key in record]
+            kind = _column_kind(values)
+            fill = '' if kind == 'str' else 0
+            dtype = {'int': np.int64, 'float': np.float64, 'str': str}[kind]
+            columns[key] = np.array([record.get(key, fill) for record in records], dtype=dtype)
+            kinds[key] = kind
+            if not mask.all():
+                present[key] = mask
+        return cls(columns, kinds, present)
+
+    @classmethod
+    def load(cls, directory=DEFAULT_STORE_DIR):
+        """Memory-map a saved store, or return None if there is none"""
+        manifest_path = os.path.join(directory, MANIFEST_FILENAME)
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('format') not in READABLE_FORMATS:
+            raise ValueError(f"Unsupported neighborhood store format: {manifest.get('format')}")
+
+        def open_array(name):
+            return np.load(os.path.join(directory, name + '.npy'), mmap_mode='r')
+
+        columns, kinds, present = {}, {}, {}
+        for column in manifest['columns']:
+            columns[column['name']] = open_array(column['name'])
+            kinds[column['name']] = column['kind']
+            if column.get('has_missing'):
+                present[column['name']] = open_array(column['name'] + '.present')
+        return cls(columns, kinds, present)
+
+    def save(self, directory=DEFAULT_STORE_DIR, source=None):
+        """Write every column; the manifest goes last so readers never see a partial store"""
+        os.makedirs(directory, exist_ok=True)
+        manifest_path = os.path.join(directory, MANIFEST_FILENAME)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        for name, values in self.columns.items():
+            np.save(os.path.join(directory, name + '.npy'), values)
+        for name, mask in self.present.items():
+            np.save(os.path.join(directory, name + '.present.npy'), mask)
+        with open(manifest_path, 'w') as f:
+            json.dump({
+                'format': FORMAT_VERSION,
+                'rows': self.size,
+                'built_at': datetime.now().isoformat(),
+                'source': source,
+                'columns': [
+                    {'name': name, 'kind': self.kinds[name], 'has_missing': name in self.present}
+                    for name in self.columns
+                ]
+            }, f, indent=2)
+
+    def __len__(self):
+        return self.size
+
+    def column(self, name):
+        """The raw array for a column (KeyError if the store has no such column)"""
+        return self.columns[name]
+
+    def column_or(self, name, default):
+        """A column with default filled in where a row has no value, or all default if absent"""
+        if name not in self.columns:
+            return np.full(self.size, default, dtype=object if isinstance(default, str) else float)
+        values = self.columns[name]
+        if name not in self.present:
+            return values
+        return np.where(self.present[name], values, default)
+
+    def has(self, name, row):
+        return name in self.columns and (name not in self.present or bool(self.present[name][row]))
+
+    def value(self, name, row):
+        """
+        One value as a plain Python object
+
+        Raises:
+            KeyError: if the column does not exist or this row has no value
+        """
+        if not self.has(name, row):
+            raise KeyError(name)
+        value = self.columns[name][row]
+        return str(value) if self.kinds[name] == 'str' else value.item()
+
+    def find(self, name):
+        """Row of a neighborhood name, or None"""
+        return self.rows_by_name.get(name)
+
+    def records(self):
+        """Every row as a plain dict, in row order (for export and offline tools)"""
+        return [
+            {name: self.value(name, row) for name in self.columns if self.has(name, row)}
+            for row in range(self.size)
+        ]
+
+
+class NeighborhoodRecord(Mapping):
+    """
+    Read-only view of one store row that looks like the original neighborhood dict
+
+    Values are read from the columns on access; nothing is copied until the
+    record is serialized. 'id' is the row number.
+    """
+    __slots__ = ('_store', 'id')
+
+    def __init__(self, store, row):
+        self._store = store
+        self.id = row
+
+    def __getitem__(self, key):
+        if key == 'id':
+            return self.id
+        return self._store.value(key, self.id)
+
+    def __iter__(self):
+        yield 'id'
+        for name in self._store.columns:
+            if self._store.has(name, self.id):
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"NeighborhoodRecord({dict(self)!r})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or export the columnar neighborhood store')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='write a JSON list of neighborhood records as a store')
+    build.add_argument('source', help='JSON file with a list of neighborhood objects')
+    build.add_argument('--output', default=os.getenv('NEIGHBORHOOD_STORE_DIR', DEFAULT_STORE_DIR))
+    export = commands.add_parser('export', help='write a store as a JSON list of records')
+    export.add_argument('--store', default=os.getenv('NEIGHBORHOOD_STORE_DIR', DEFAULT_STORE_DIR))
+    export.add_argument('--output', required=True)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        store = NeighborhoodStore.load(args.store)
+        if store is None:
+            raise SystemExit(f"No neighborhood store at {args.store}")
+        with open(args.output, 'w') as f:
+            json.dump(store.records(), f, indent=2)
+        print(f"Exported {len(store)} neighborhoods to {args.output}")
+        return
+
+    with open(args.source, 'r') as f:
+        store = NeighborhoodStore.from_records(json.load(f))
+    store.save(args.output, source=os.path.basename(args.source))
+    size = sum(os.path.getsize(os.path.join(args.output, f)) for f in os.listdir(args.output))
+    print(f"Saved {len(store)} neighborhoods x {len(store.columns)} columns to {args.output} "
+          f"({size / 1024:.0f} KiB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""
+Precomputed price lookup grid for instant predictions
+
+The grid holds the model's base price for every combination of
+(location, TYPE, BEDS, BATH, PROPERTYSQFT bucket). It is built offline with
+
+    python price_grid.py
+
+and memory-mapped at runtime, so every worker shares one read-only copy.
+Only inputs that land exactly on a grid point are answered from it: the
+gradient-boosted model is a step function of its numeric inputs, so
+interpolating between grid points can be far off. Every other input
+returns NaN and is left to the live model.
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+LOCATION_COLUMNS = (
+    'ADMINISTRATIVE_AREA_LEVEL_2', 'LOCALITY', 'SUBLOCALITY', 'STREET_NAME',
+    'LATITUDE', 'LONGITUDE'
+)
+NUMERIC_AXES = ('BEDS', 'BATH', 'PROPERTYSQFT')
+
+DEFAULT_GRID_PATH = 'models/price_grid.npy'
+DEFAULT_TYPES = ('CONDO', 'HOUSE', 'TOWNHOUSE', 'APARTMENT')
+DEFAULT_BEDS = tuple(range(0, 7))
+DEFAULT_BATHS = tuple(np.arange(1.0, 5.01, 0.5))
+DEFAULT_SQFT = tuple(range(300, 5001, 100))
+
+
+def model_fingerprint(model_path):
+    """Hash the model file so a grid is never served for a different model"""
+    digest = hashlib.sha256()
+    with open(model_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _location_key(input_data):
+    key = []
+    for column in LOCATION_COLUMNS:
+        value = input_data.get(column)
+        if isinstance(value, str):
+            value = value.strip()
+        elif isinstance(value, (int, float, np.number)):
+            value = round(float(value), 6)
+        key.append(value)
+    return tuple(key)
+
+
+def _metadata_path(grid_path):
+    return os.path.splitext(grid_path)[0] + '.json'
+
+
+class PriceGrid:
+    def __init__(self, prices, locations, types, axes):
+        """
+        Args:
+            prices: array shaped (locations, types, beds, baths, sqft)
+            locations: list of location field lists, in LOCATION_COLUMNS order
+            types: list of TYPE values
+            axes: dict mapping each NUMERIC_AXES name to its sorted grid points
+        """
+        self.prices = prices
+        self.location_index = {_location_key(dict(zip(LOCATION_COLUMNS, loc))): i
+                               for i, loc in enumerate(locations)}
+        self.type_index = {t: i for i, t in enumerate(types)}
+        self.axes = [np.asarray(axes[name], dtype=float) for name in NUMERIC_AXES]
+
+    @classmethod
+    def load(cls, grid_path, fingerprint=None):
+        """
+        Memory-map a grid built by build_price_grid
+
+        Returns None when the files are missing or were built from a
+        different model than the one identified by fingerprint.
+        """
+        meta_path = _metadata_path(grid_path)
+        if not (os.path.exists(grid_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        if fingerprint is not None and meta.get('model_fingerprint') != fingerprint:
+            print(f"Price grid at {grid_path} was built for a different model; ignoring it")
+            return None
+        prices = np.load(grid_path, mmap_mode='r')
+        return cls(prices, meta['locations'], meta['types'], meta['axes'])
+
+    def lookup_batch(self, input_list):
+        """
+        Base prices for a list of input dicts that land exactly on grid points
+
+        The model is piecewise constant in its numeric inputs, so values
+        between grid points cannot be interpolated from the corners; those
+        rows return NaN and are left to the live model.
+
+        Returns:
+            np.ndarray: prices, NaN for rows not on a grid point
+        """
+        n = len(input_list)
+        result = np.full(n, np.nan)
+        rows = np.full(n, -1)
+        types = np.full(n, -1)
+        points = np.full((n, len(NUMERIC_AXES)), np.nan)
+
+        for i, input_data in enumerate(input_list):
+            rows[i] = self.location_index.get(_location_key(input_data), -1)
+            property_type = input_data.get('TYPE')
+            if isinstance(property_type, str):
+                types[i] = self.type_index.get(property_type.strip(), -1)
+            for j, name in enumerate(NUMERIC_AXES):
+                try:
+                    points[i, j] = float(input_data.get(name))
+                except (TypeError, ValueError):
+                    pass
+
+        on_grid = (rows >= 0) & (types >= 0)
+        index = [rows, types]
+        for j, axis in enumerate(self.axes):
+            position = np.minimum(np.searchsorted(axis, points[:, j]), len(axis) - 1)
+            on_grid &= axis[position] == points[:, j]
+            index.append(position)
+        if not on_grid.any():
+            return result
+
+        result[on_grid] = self.prices[tuple(i[on_grid] for i in index)]
+        return result
+
+
+def build_price_grid(model, locations, types=DEFAULT_TYPES, beds=DEFAULT_BEDS,
+                     baths=DEFAULT_BATHS, sqft=DEFAULT_SQFT):
+    """
+    Evaluate the model over every grid point
+
+    Args:
+        model: fitted pipeline with a predict(DataFrame) method
+        locations: list of location field lists, in LOCATION_COLUMNS order
+
+    Returns:
+        np.ndarray: float32 prices shaped (locations, types, beds, baths, sqft)
+    """
+    import pandas as pd
+
+    numeric = np.array(np.meshgrid(beds, baths, sqft, indexing='ij')).reshape(3, -1).T
+    shape = (len(locations), len(types), len(beds), len(baths), len(sqft))
+    prices = np.empty(shape, dtype=np.float32)
+
+    for i, location in enumerate(locations):
+        for t, property_type in enumerate(types):
+            frame = pd.DataFrame(numeric, columns=list(NUMERIC_AXES))
+            frame['TYPE'] = property_type
+            for column, value in zip(LOCATION_COLUMNS, location):
+                frame[column] = value
+            prices[i, t] = model.predict(frame).reshape(shape[2:])
+    return prices
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the precomputed price lookup grid')
+    parser.add_argument('--model', default='models/advanced_house_price_model.joblib')
+    parser.add_argument('--output', default=DEFAULT_GRID_PATH)
+    args = parser.parse_args()
+
+    from model_predictor import HousingPredictor
+    from neighborhood_data import get_nyc_neighborhoods
+
+    predictor = HousingPredictor(args.model)
+    if predictor.model is None:
+        raise SystemExit('Cannot build a price grid without a trained model')
+
+    locations = [
+        [n['admin_area'], n['locality'], n['sublocality'], n['street_name'], n['lat'], n['lng']]
+        for n in get_nyc_neighborhoods()
+    ]
+    prices = build_price_grid(predictor.model, locations)
+
+    np.save(args.output, prices)
+    with open(_metadata_path(args.output), 'w') as f:
+        json.dump({
+            'model_fingerprint': model_fingerprint(args.model),
+            'locations': locations,
+            'types': list(DEFAULT_TYPES),
+            'axes': {
+                'BEDS': [float(v) for v in DEFAULT_BEDS],
+                'BATH': [float(v) for v in DEFAULT_BATHS],
+                'PROPERTYSQFT': [float(v) for v in DEFAULT_SQFT]
+            }
+        }, f)
+    print(f"Saved price grid {prices.shape} to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Fast response encoding for the hot API routes
+
+dumps() uses orjson when it is installed and falls back to the standard
+json module. Static blocks such as neighborhood details are serialized once
+into a FragmentCache and spliced into responses as raw bytes. Clients that
+send Accept: application/msgpack get MessagePack when msgpack is installed.
+"""
+import json
+from collections.abc import Mapping
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+
+def _default(o):
+    if isinstance(o, Mapping):
+        return dict(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Serialize to compact JSON bytes with sorted keys"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, default=_default, sort_keys=True, separators=(',', ':')).encode()
+
+
+class FragmentCache:
+    """JSON bytes for static objects, built on first use and reused afterwards"""
+
+    def __init__(self, build):
+        """
+        Args:
+            build: callable(key) -> the object to serialize for key
+        """
+        self._build = build
+        self._fragments = {}
+
+    def get(self, key):
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            fragment = self._fragments[key] = dumps(self._build(key))
+        return fragment
+
+
+def splice(obj, fragments):
+    """
+    Serialize a dict to JSON with extra pre-serialized members appended
+
+    Args:
+        obj: dict to serialize normally
+        fragments: [(key, JSON bytes)] added after obj's own members
+
+    Returns:
+        bytes
+    """
+    body = dumps(obj)
+    if not fragments:
+        return body
+    members = b','.join(dumps(key) + b':' + fragment for key, fragment in fragments)
+    return body[:-1] + (b',' if len(body) > 2 else b'') + members + b'}'
+
+
+def wants_msgpack(accept_mimetypes):
+    """True when msgpack is available and the client prefers it over JSON"""
+    if msgpack is None:
+        return False
+    return accept_mimetypes.best_match([JSON_MIMETYPE, MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE
+
+
+def packb(obj):
+    """Serialize to MessagePack bytes"""
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
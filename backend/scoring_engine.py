@@ -2,14 +2,42 @@
 Scoring engine to calculate lifestyle compatibility between user preferences
 and neighborhood characteristics
 """
+from math import radians, sin, cos, sqrt, atan2
 
-def calculate_compatibility_score(quiz_results, neighborhood):
+import numpy as np
+
+EARTH_RADIUS_MILES = 3959
+
+# (quiz key, neighborhood key, neighborhood default, divisor to 0-10 scale, weight)
+ATTRIBUTE_COMPONENTS = (
+    ('walkability', 'walkability', 50, 10, 15),
+    ('food_importance', 'food_score', 5, 1, 12),
+    ('nightlife', 'nightlife_score', 5, 1, 10),
+    ('public_transit', 'transit_score', 5, 1, 13),
+    ('parks', 'parks_score', 5, 1, 8),
+    ('diversity', 'diversity_score', 5, 1, 7),
+    ('safety', 'safety_score', 5, 1, 15),
+)
+COMMUTE_WEIGHT = 10
+DEMOGRAPHIC_WEIGHT = 10
+
+# Breakdown keys, in ATTRIBUTE_COMPONENTS order followed by commute and demographics
+BREAKDOWN_COMPONENTS = ('walkability', 'food', 'nightlife', 'transit', 'parks', 'diversity', 'safety',
+                        'commute', 'demographics')
+
+# Columns of NeighborhoodMatrix.values
+MATRIX_COLUMNS = tuple(c[1] for c in ATTRIBUTE_COMPONENTS) + ('lat', 'lng', 'demographic')
+LAT, LNG, DEMOGRAPHIC = len(ATTRIBUTE_COMPONENTS), len(ATTRIBUTE_COMPONENTS) + 1, len(ATTRIBUTE_COMPONENTS) + 2
+
+def calculate_compatibility_score(quiz_results, neighborhood, transit=None):
     """
     Calculate a 0-100 compatibility score based on quiz results and neighborhood data
 
     Args:
         quiz_results: dict with user quiz answers
         neighborhood: dict with neighborhood characteristics
+        transit: optional TransitMatrix; with it, a quiz that sets
+            max_commute_minutes is scored on transit time instead of miles
 
     Returns:
         float: compatibility score (0-100)
@@ -69,8 +97,21 @@ def calculate_compatibility_score(quiz_results, neighborhood):
     total_score += safety_match * 15
     weights_sum += 15
 
-    # 8. Commute distance preference (weight: 10)
-    if 'target_location' in quiz_results and 'lat' in neighborhood:
+    # 8. Commute preference (weight: 10): transit minutes when available, else straight-line miles
+    commute_minutes = None
+    if transit is not None and 'target_location' in quiz_results and 'max_commute_minutes' in quiz_results:
+        commute_minutes = transit.commute_minutes(
+            neighborhood, quiz_results['target_location']['lat'], quiz_results['target_location']['lng']
+        )
+    if commute_minutes is not None:
+        max_minutes = quiz_results['max_commute_minutes']
+        if commute_minutes <= max_minutes:
+            commute_match = 100 - (commute_minutes / max_minutes * 100) if max_minutes > 0 else 100
+        else:
+            commute_match = 0
+        total_score += commute_match * 10
+        weights_sum += 10
+    elif 'target_location' in quiz_results and 'lat' in neighborhood:
         max_distance = quiz_results.get('max_commute_miles', 10)
         actual_distance = calculate_distance(
             quiz_results['target_location']['lat'],
@@ -107,9 +148,7 @@ def calculate_distance(lat1, lng1, lat2, lng2):
     """
     Calculate distance between two points in miles using Haversine formula
     """
-    from math import radians, sin, cos, sqrt, atan2
-
-    R = 3959  # Earth's radius in miles
+    R = EARTH_RADIUS_MILES
 
     lat1, lng1, lat2, lng2 = map(radians, [lat1, lng1, lat2, lng2])
 
@@ -122,36 +161,293 @@ def calculate_distance(lat1, lng1, lat2, lng2):
     distance = R * c
     return distance
 
-def get_score_breakdown(quiz_results, neighborhood):
+class NeighborhoodMatrix:
     """
-    Get detailed breakdown of compatibility scores for UI display
+    Neighborhood attributes as one float matrix for vectorized scoring
+
+    values has one row per neighborhood and MATRIX_COLUMNS as columns. The
+    attribute columns hold the raw neighborhood values (missing ones take
+    the same defaults as calculate_compatibility_score), lat/lng are NaN
+    when unknown, and the demographic column holds an integer code from
+    demographic_codes. radians holds [lat, lng] in radians for distance
+    computations and the spatial index. With a TransitMatrix, transit_rows
+    maps each neighborhood to its row there (-1 if it was not in the build).
     """
-    breakdown = {
-        'walkability': 0,
-        'food': 0,
-        'nightlife': 0,
-        'transit': 0,
-        'parks': 0,
-        'diversity': 0,
-        'safety': 0,
-        'commute': 0,
-        'demographics': 0
-    }
 
-    if not quiz_results:
-        return breakdown
+    def __init__(self, neighborhoods, transit=None):
+        demographic_codes = {}
+        values = np.empty((len(neighborhoods), len(MATRIX_COLUMNS)))
+        for i, neighborhood in enumerate(neighborhoods):
+            for j, (_, key, default, _, _) in enumerate(ATTRIBUTE_COMPONENTS):
+                values[i, j] = neighborhood.get(key, default)
+            has_location = 'lat' in neighborhood
+            values[i, LAT] = neighborhood['lat'] if has_location else np.nan
+            values[i, LNG] = neighborhood['lng'] if has_location else np.nan
+            demographic = neighborhood.get('primary_demographic', 'mixed')
+            values[i, DEMOGRAPHIC] = demographic_codes.setdefault(demographic, len(demographic_codes))
+        self._set(values, demographic_codes, [n.get('name') for n in neighborhoods], transit)
+
+    @classmethod
+    def from_store(cls, store, transit=None):
+        """Build straight from a NeighborhoodStore's columns, without touching records"""
+        values = np.empty((len(store), len(MATRIX_COLUMNS)))
+        for j, (_, key, default, _, _) in enumerate(ATTRIBUTE_COMPONENTS):
+            values[:, j] = store.column_or(key, default)
+        values[:, LAT] = store.column_or('lat', np.nan)
+        values[:, LNG] = store.column_or('lng', np.nan)
+        demographics, values[:, DEMOGRAPHIC] = np.unique(
+            store.column_or('primary_demographic', 'mixed'), return_inverse=True
+        )
+        matrix = cls.__new__(cls)
+        matrix._set(values, {str(d): i for i, d in enumerate(demographics)}, store.column('name'), transit)
+        return matrix
+
+    def subset(self, rows):
+        """A NeighborhoodMatrix over just these rows, in the given order"""
+        matrix = NeighborhoodMatrix.__new__(NeighborhoodMatrix)
+        matrix.values = self.values[rows]
+        matrix.demographic_codes = self.demographic_codes
+        matrix.radians = self.radians[rows]
+        matrix.transit = self.transit
+        matrix.transit_rows = None if self.transit_rows is None else self.transit_rows[rows]
+        return matrix
+
+    def _set(self, values, demographic_codes, names, transit):
+        self.values = values
+        self.demographic_codes = demographic_codes
+        self.radians = np.radians(values[:, [LAT, LNG]])
+        self.transit = transit
+        self.transit_rows = transit.align(names) if transit else None
+
+    def __len__(self):
+        return self.values.shape[0]
+
+
+def haversine_miles(lat, lng, lats, lngs):
+    """Vectorized haversine distance in miles from one point to arrays of points"""
+    return haversine_miles_radians(np.radians(lat), np.radians(lng), np.radians(lats), np.radians(lngs))
+
 
-    # Calculate each component (simplified version of main function)
-    if 'walkability' in quiz_results:
-        walkability_pref = quiz_results['walkability']
-        neighborhood_walkability = neighborhood.get('walkability', 50) / 10
-        breakdown['walkability'] = 100 - (abs(walkability_pref - neighborhood_walkability) * 10)
+def haversine_miles_radians(lat, lng, lats, lngs):
+    """haversine_miles for coordinates already in radians"""
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    return EARTH_RADIUS_MILES * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
 
-    if 'food_importance' in quiz_results:
-        food_pref = quiz_results['food_importance']
-        neighborhood_food = neighborhood.get('food_score', 5)
-        breakdown['food'] = 100 - (abs(food_pref - neighborhood_food) * 10)
 
-    # Add more breakdowns as needed...
+# Profile matrix columns after the ATTRIBUTE_COMPONENTS preferences
+TARGET_LAT, TARGET_LNG, MAX_COMMUTE, MAX_COMMUTE_MINUTES, AGE_CODE = (
+    len(ATTRIBUTE_COMPONENTS) + i for i in range(5)
+)
+NO_PREFERENCE_CODE = -2
+UNKNOWN_DEMOGRAPHIC_CODE = -1
+
+# Upper bound on profiles x neighborhoods cells scored at once
+SCORE_CHUNK_CELLS = 1 << 20
+
+
+class ProfileMatrix:
+    """
+    Many quiz results as one float matrix, encoded against a NeighborhoodMatrix
+
+    values has one row per quiz: the seven attribute preferences, the
+    commute target lat/lng (NaN without a target), max_commute_miles,
+    max_commute_minutes (NaN if not set) and the age preference as a demographic code. Empty quizzes are flagged in
+    neutral and score 50 everywhere, like calculate_compatibility_score.
+    """
+
+    def __init__(self, quiz_results_list, neighborhood_matrix):
+        n = len(quiz_results_list)
+        values = np.empty((n, len(ATTRIBUTE_COMPONENTS) + 5))
+        self.neutral = np.zeros(n, dtype=bool)
+        codes = neighborhood_matrix.demographic_codes
+        for i, quiz_results in enumerate(quiz_results_list):
+            if not quiz_results:
+                self.neutral[i] = True
+                values[i] = 0
+                continue
+            for j, (quiz_key, _, _, _, _) in enumerate(ATTRIBUTE_COMPONENTS):
+                values[i, j] = float(quiz_results.get(quiz_key, 5))
+            if 'target_location' in quiz_results:
+                values[i, TARGET_LAT] = float(quiz_results['target_location']['lat'])
+                values[i, TARGET_LNG] = float(quiz_results['target_location']['lng'])
+            else:
+                values[i, TARGET_LAT] = values[i, TARGET_LNG] = np.nan
+            values[i, MAX_COMMUTE] = float(quiz_results.get('max_commute_miles', 10))
+            values[i, MAX_COMMUTE_MINUTES] = float(quiz_results.get('max_commute_minutes', np.nan))
+            age_pref = quiz_results.get('age_group_preference', 'mixed')
+            if age_pref == 'no_preference':
+                values[i, AGE_CODE] = NO_PREFERENCE_CODE
+            else:
+                values[i, AGE_CODE] = codes.get(age_pref, UNKNOWN_DEMOGRAPHIC_CODE)
+        self.values = values
+
+    def __len__(self):
+        return self.values.shape[0]
+
+
+def _commute_match(actual, limit):
+    """100 at the target falling linearly to 0 at limit, and 0 beyond it or when actual is NaN"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(actual <= limit, np.where(limit > 0, 100 - (actual / limit * 100), 100), 0.0)
+
+
+def _commute_block(profiles, matrix):
+    """(match, included) commute arrays for profile rows that all have a target"""
+    distance = haversine_miles_radians(np.radians(profiles[:, TARGET_LAT, None]),
+                                       np.radians(profiles[:, TARGET_LNG, None]),
+                                       matrix.radians[None, :, 0], matrix.radians[None, :, 1])
+    included = ~np.isnan(distance)
+    match = _commute_match(distance, profiles[:, MAX_COMMUTE, None])
+
+    if matrix.transit is not None:
+        # One transit lookup per profile; the matrix makes it O(1) per neighborhood
+        for p in np.flatnonzero(~np.isnan(profiles[:, MAX_COMMUTE_MINUTES]) & ~np.isnan(profiles[:, TARGET_LAT])):
+            minutes = matrix.transit.minutes_to(matrix.transit_rows, profiles[p, TARGET_LAT],
+                                                profiles[p, TARGET_LNG], matrix.radians)
+            by_transit = ~np.isnan(minutes)
+            match[p] = np.where(by_transit, _commute_match(minutes, profiles[p, MAX_COMMUTE_MINUTES]), match[p])
+            included[p] |= by_transit
+    return match, included
+
+
+def _score_block(profiles, neutral, matrix, with_components=False):
+    """
+    Score a block of profile rows against every neighborhood by broadcasting
+
+    With with_components, also return {BREAKDOWN_COMPONENTS key: array} of the
+    unweighted component matches that went into the total. A component that
+    does not apply (no commute target, no quiz) is NaN.
+    """
+    values = matrix.values
+    shape = (profiles.shape[0], values.shape[0])
+    total_score = np.zeros(shape)
+    weights_sum = np.zeros(shape)
+    components = {}
+
+    # Accumulate in the same order as calculate_compatibility_score so results match exactly
+    for j, (_, _, _, divisor, weight) in enumerate(ATTRIBUTE_COMPONENTS):
+        attribute = values[:, j] / divisor if divisor != 1 else values[:, j]
+        match = 100 - np.abs(profiles[:, j, None] - attribute[None, :]) * 10
+        total_score += match * weight
+        weights_sum += weight
+        components[BREAKDOWN_COMPONENTS[j]] = match
+
+    has_target = ~np.isnan(profiles[:, TARGET_LAT])
+    if has_target.any():
+        commute_match, included = _commute_block(profiles, matrix)
+        total_score += np.where(included, commute_match * COMMUTE_WEIGHT, 0)
+        weights_sum += np.where(included, COMMUTE_WEIGHT, 0)
+        components['commute'] = np.where(included, commute_match, np.nan)
+    else:
+        components['commute'] = np.full(shape, np.nan)
 
-    return breakdown
+    age_code = profiles[:, AGE_CODE, None]
+    age_match = np.where((age_code == NO_PREFERENCE_CODE) | (age_code == values[None, :, DEMOGRAPHIC]),
+                         100.0, 50.0)
+    total_score += age_match * DEMOGRAPHIC_WEIGHT
+    weights_sum += DEMOGRAPHIC_WEIGHT
+    components['demographics'] = age_match
+
+    scores = np.clip(total_score / weights_sum, 0, 100)
+    scores[neutral] = 50.0
+    if not with_components:
+        return scores
+    for name in BREAKDOWN_COMPONENTS:
+        components[name][neutral] = np.nan
+    return scores, components
+
+
+def iter_score_chunks(profiles, matrix, chunk_size=None):
+    """
+    Yield (first_profile_index, scores) blocks of the profiles x neighborhoods matrix
+
+    Memory stays bounded by chunk_size x len(matrix) cells per block
+    (default: SCORE_CHUNK_CELLS in total).
+    """
+    chunk_size = chunk_size or max(1, SCORE_CHUNK_CELLS // max(1, len(matrix)))
+    for start in range(0, len(profiles), chunk_size):
+        stop = start + chunk_size
+        yield start, _score_block(profiles.values[start:stop], profiles.neutral[start:stop], matrix)
+
+
+def score_profiles(profiles, matrix, chunk_size=None):
+    """
+    Score every profile against every neighborhood
+
+    Returns:
+        np.ndarray: (len(profiles), len(matrix)) compatibility scores
+    """
+    scores = np.empty((len(profiles), len(matrix)))
+    for start, block in iter_score_chunks(profiles, matrix, chunk_size):
+        scores[start:start + block.shape[0]] = block
+    return scores
+
+
+def top_k_per_profile(profiles, matrix, k, chunk_size=None):
+    """
+    Best k neighborhoods for each profile, without building or sorting the full score matrix
+
+    Returns:
+        (indices, scores): two (len(profiles), k) arrays, best match first
+    """
+    k = min(k, len(matrix))
+    indices = np.empty((len(profiles), k), dtype=np.intp)
+    top_scores = np.empty((len(profiles), k))
+    for start, block in iter_score_chunks(profiles, matrix, chunk_size):
+        stop = start + block.shape[0]
+        # argpartition finds the k best in linear time; only those k are sorted
+        candidates = np.argpartition(-block, k - 1, axis=1)[:, :k] if k < block.shape[1] \
+            else np.broadcast_to(np.arange(block.shape[1]), block.shape)
+        candidate_scores = np.take_along_axis(block, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind='stable')
+        indices[start:stop] = np.take_along_axis(candidates, order, axis=1)
+        top_scores[start:stop] = np.take_along_axis(candidate_scores, order, axis=1)
+    return indices, top_scores
+
+
+def score_neighborhoods(quiz_results, matrix):
+    """
+    Score one quiz against every row of a NeighborhoodMatrix at once
+
+    Returns the same numbers as calling calculate_compatibility_score on each
+    neighborhood: the components are accumulated in the same order.
+
+    Returns:
+        np.ndarray: compatibility scores (0-100), one per neighborhood
+    """
+    return score_profiles(ProfileMatrix([quiz_results], matrix), matrix)[0]
+
+
+def score_neighborhoods_with_breakdown(quiz_results, matrix):
+    """
+    Score one quiz against every neighborhood and keep the component matches
+
+    The components come out of the same pass that produces the totals, so
+    explaining a ranking costs no extra scoring.
+
+    Returns:
+        (scores, components): scores as from score_neighborhoods, and a dict
+        mapping each BREAKDOWN_COMPONENTS key to one 0-100 match per
+        neighborhood (NaN where the component does not apply)
+    """
+    profiles = ProfileMatrix([quiz_results], matrix)
+    scores, components = _score_block(profiles.values, profiles.neutral, matrix, with_components=True)
+    return scores[0], {name: values[0] for name, values in components.items()}
+
+
+def get_score_breakdown(quiz_results, neighborhood, transit=None):
+    """
+    Get detailed breakdown of compatibility scores for UI display
+
+    Components that do not apply (no quiz, no commute target) are 0.
+    """
+    if not quiz_results:
+        return {name: 0 for name in BREAKDOWN_COMPONENTS}
+
+    _, components = score_neighborhoods_with_breakdown(
+        quiz_results, NeighborhoodMatrix([neighborhood], transit)
+    )
+    return {
+        name: 0 if np.isnan(values[0]) else float(values[0])
+        for name, values in components.items()
+    }
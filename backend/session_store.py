@@ -0,0 +1,104 @@
+"""
+Per-session quiz state with sharded locks and TTL expiry
+
+Sessions are spread over independent shards, each with its own lock, so
+concurrent users only contend when their session ids hash to the same
+shard. Entries expire ttl_seconds after their last write; a background
+sweep drops expired entries from memory and from the backing StateStore.
+
+With a backing store, the store is the source of truth and memory is only
+a short read cache (cache_seconds). Other worker processes write the same
+sessions without notifying this one, so a write made elsewhere is seen
+here within cache_seconds.
+"""
+import threading
+import time
+import zlib
+
+_MISSING = object()
+
+
+class _Shard:
+    __slots__ = ('lock', 'entries')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # session -> (value, expires_at)
+        self.entries = {}
+
+
+class SessionStore:
+    def __init__(self, backing=None, shards=64, ttl_seconds=30 * 24 * 3600, cache_seconds=5.0):
+        """
+        Args:
+            backing: optional StateStore that persists quiz results across
+                restarts and is shared with other processes
+            shards: number of independently locked partitions
+            ttl_seconds: how long a session's state lives after its last write
+            cache_seconds: how long a value read from or written to backing
+                is served from memory before backing is read again
+        """
+        self.backing = backing
+        self.ttl = ttl_seconds
+        # Without a backing store memory is the only copy, so it lives for the full TTL
+        self.memory_seconds = ttl_seconds if backing is None else min(cache_seconds, ttl_seconds)
+        self._shards = [_Shard() for _ in range(shards)]
+
+    def _shard(self, session):
+        # crc32 rather than hash() so shard choice is stable across processes
+        return self._shards[zlib.crc32(session.encode()) % len(self._shards)]
+
+    def get(self, session):
+        """Quiz results for a session, or None if it has none or they expired"""
+        shard = self._shard(session)
+        now = time.monotonic()
+        with shard.lock:
+            value, expires_at = shard.entries.get(session, (_MISSING, 0))
+            if value is not _MISSING and expires_at > now:
+                return value
+        if self.backing is None:
+            return None
+        # Not cached or cached too long ago: read through, outside the shard lock
+        value = self.backing.get_quiz_results(session, max_age_seconds=self.ttl)
+        if value is not None:
+            with shard.lock:
+                shard.entries[session] = (value, now + self.memory_seconds)
+        return value
+
+    def set(self, session, value):
+        shard = self._shard(session)
+        with shard.lock:
+            shard.entries[session] = (value, time.monotonic() + self.memory_seconds)
+        if self.backing is not None:
+            self.backing.set_quiz_results(value, session)
+
+    def purge_expired(self):
+        """Drop expired sessions; returns how many were removed from memory"""
+        removed = 0
+        now = time.monotonic()
+        for shard in self._shards:
+            with shard.lock:
+                expired = [s for s, (_, expires_at) in shard.entries.items() if expires_at <= now]
+                for session in expired:
+                    del shard.entries[session]
+            removed += len(expired)
+        if self.backing is not None:
+            self.backing.delete_stale_quiz_results(self.ttl)
+        return removed
+
+    def start_sweeper(self, interval=600.0):
+        """Run purge_expired every interval seconds on a daemon thread; returns the thread"""
+        def sweep():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.purge_expired()
+                except Exception as e:
+                    print(f"Session sweep failed: {e}")
+
+        thread = threading.Thread(target=sweep, name='session-sweeper', daemon=True)
+        thread.start()
+        return thread
+
+    def __len__(self):
+        return sum(len(shard.entries) for shard in self._shards)
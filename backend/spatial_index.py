@@ -0,0 +1,106 @@
+"""
+Spatial indexes over neighborhood coordinates
+
+SpatialIndex keeps coordinates in radians in a ball tree on the haversine
+metric, so radius and nearest-neighbor queries cost O(log n) instead of a
+distance computation per neighborhood. GridIndex buckets coordinates into
+lat/lng cells for map viewport (bounding-box) queries.
+"""
+import numpy as np
+from sklearn.neighbors import BallTree
+
+from scoring_engine import EARTH_RADIUS_MILES
+
+
+class SpatialIndex:
+    def __init__(self, lat_lng_radians, leaf_size=16):
+        """
+        Args:
+            lat_lng_radians: (n, 2) array of [lat, lng] in radians; rows with
+                NaN (no known location) are left out of the index
+            leaf_size: ball tree leaf size
+        """
+        lat_lng_radians = np.asarray(lat_lng_radians, dtype=float)
+        # Map tree positions back to the caller's row numbers
+        self.ids = np.flatnonzero(~np.isnan(lat_lng_radians).any(axis=1))
+        self._tree = BallTree(lat_lng_radians[self.ids], leaf_size=leaf_size, metric='haversine') \
+            if len(self.ids) else None
+
+    @staticmethod
+    def _query_point(lat, lng):
+        return np.radians([[lat, lng]])
+
+    def within_radius(self, lat, lng, miles):
+        """
+        Neighborhoods within miles of a point, nearest first
+
+        Returns:
+            (ids, distances): row numbers and distances in miles
+        """
+        if self._tree is None:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        positions, distances = self._tree.query_radius(
+            self._query_point(lat, lng), r=miles / EARTH_RADIUS_MILES,
+            return_distance=True, sort_results=True
+        )
+        return self.ids[positions[0]], distances[0] * EARTH_RADIUS_MILES
+
+    def nearest(self, lat, lng, k=1):
+        """
+        The k neighborhoods nearest to a point, nearest first
+
+        Returns:
+            (ids, distances): row numbers and distances in miles
+        """
+        k = min(k, len(self.ids))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        distances, positions = self._tree.query(self._query_point(lat, lng), k=k)
+        return self.ids[positions[0]], distances[0] * EARTH_RADIUS_MILES
+
+
+def grid_cells(lat_lng, cell_degrees):
+    """Label each [lat, lng] row with its cell on a cell_degrees grid (equal labels share a cell)"""
+    cells = np.floor(np.asarray(lat_lng, dtype=float) / cell_degrees).astype(np.int64)
+    _, labels = np.unique(cells, axis=0, return_inverse=True)
+    return labels.reshape(-1)
+
+
+class GridIndex:
+    def __init__(self, lat_lng, cell_degrees=0.02):
+        """
+        Bucket points into a uniform lat/lng grid for bounding-box queries
+
+        Args:
+            lat_lng: (n, 2) array of [lat, lng] in degrees; NaN rows are skipped
+            cell_degrees: cell edge length
+        """
+        self.lat_lng = np.asarray(lat_lng, dtype=float)
+        self.cell_degrees = cell_degrees
+        ids = np.flatnonzero(~np.isnan(self.lat_lng).any(axis=1))
+        cells = np.floor(self.lat_lng[ids] / cell_degrees).astype(np.int64)
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        ids, cells = ids[order], cells[order]
+        starts = np.flatnonzero(np.r_[True, (np.diff(cells, axis=0) != 0).any(axis=1)])
+        ends = np.r_[starts[1:], len(ids)]
+        # (row, col) -> ids in that cell
+        self._cells = {
+            (int(cells[s, 0]), int(cells[s, 1])): ids[s:e] for s, e in zip(starts, ends)
+        }
+
+    def in_bbox(self, south, west, north, east):
+        """Ids of points inside the box (edges included), in ascending order"""
+        row0, row1 = int(np.floor(south / self.cell_degrees)), int(np.floor(north / self.cell_degrees))
+        col0, col1 = int(np.floor(west / self.cell_degrees)), int(np.floor(east / self.cell_degrees))
+        # Visit whichever is smaller: the cells under the box or the occupied cells
+        if (row1 - row0 + 1) * (col1 - col0 + 1) <= len(self._cells):
+            buckets = [self._cells.get((r, c)) for r in range(row0, row1 + 1) for c in range(col0, col1 + 1)]
+        else:
+            buckets = [ids for (r, c), ids in self._cells.items() if row0 <= r <= row1 and col0 <= c <= col1]
+        buckets = [ids for ids in buckets if ids is not None]
+        if not buckets:
+            return np.empty(0, dtype=np.intp)
+        candidates = np.concatenate(buckets)
+        lat, lng = self.lat_lng[candidates, 0], self.lat_lng[candidates, 1]
+        inside = (lat >= south) & (lat <= north) & (lng >= west) & (lng <= east)
+        return np.sort(candidates[inside])
@@ -0,0 +1,430 @@
+"""
+SQLite-backed application state: quiz results and neighborhood reviews
+
+The database runs in WAL mode so readers never block the writer, every
+write is a single-row transaction (O(1) however many reviews exist), and a
+crash can never leave a half-written state file behind. Connections come
+from a small bounded pool and are reused across requests and threads
+(a threaded server starts a fresh thread per request); sqlite3 keeps the
+prepared statements for the constant SQL below cached per connection.
+
+Reviews are read a page at a time with a keyset cursor on the
+(neighborhood, date, id) index. A trigger keeps per-neighborhood running
+totals in review_stats (count, rating sum and a 1-5 histogram) inside the
+same transaction as each insert, so summaries never scan the reviews.
+
+Review comments are also indexed in an FTS5 table (porter-stemmed, kept in
+step by another insert trigger) and searched with BM25 ranking. SQLite
+builds without FTS5 fall back to an unranked LIKE scan.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DEFAULT_DB_PATH = 'data/app_state.db'
+DEFAULT_SESSION = 'default'
+# Connections open at once; callers beyond this wait for one to be returned
+DEFAULT_POOL_SIZE = 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quiz_results (
+    session TEXT PRIMARY KEY,
+    results TEXT NOT NULL,
+    updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+CREATE INDEX IF NOT EXISTS quiz_results_by_updated_at ON quiz_results (updated_at);
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    neighborhood TEXT NOT NULL,
+    author TEXT NOT NULL,
+    rating INTEGER NOT NULL CHECK (rating BETWEEN 1 AND 5),
+    comment TEXT NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reviews_by_neighborhood_date ON reviews (neighborhood, date, id);
+CREATE TABLE IF NOT EXISTS review_stats (
+    neighborhood TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    rating_sum INTEGER NOT NULL,
+    r1 INTEGER NOT NULL,
+    r2 INTEGER NOT NULL,
+    r3 INTEGER NOT NULL,
+    r4 INTEGER NOT NULL,
+    r5 INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS reviews_update_stats AFTER INSERT ON reviews BEGIN
+    INSERT INTO review_stats VALUES (
+        NEW.neighborhood, 1, NEW.rating, NEW.rating = 1, NEW.rating = 2, NEW.rating = 3,
+        NEW.rating = 4, NEW.rating = 5
+    )
+    ON CONFLICT (neighborhood) DO UPDATE SET
+        count = count + 1, rating_sum = rating_sum + excluded.rating_sum,
+        r1 = r1 + excluded.r1, r2 = r2 + excluded.r2, r3 = r3 + excluded.r3,
+        r4 = r4 + excluded.r4, r5 = r5 + excluded.r5;
+END;
+-- Databases created before review_stats existed: total up their reviews once
+INSERT INTO review_stats
+SELECT neighborhood, COUNT(*), SUM(rating), SUM(rating = 1), SUM(rating = 2), SUM(rating = 3),
+       SUM(rating = 4), SUM(rating = 5)
+FROM reviews WHERE NOT EXISTS (SELECT 1 FROM review_stats) GROUP BY neighborhood;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# External-content index over reviews.comment: the text is stored once, in reviews
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS reviews_fts USING fts5(
+    comment, content='reviews', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS reviews_index_comment AFTER INSERT ON reviews BEGIN
+    INSERT INTO reviews_fts (rowid, comment) VALUES (NEW.id, NEW.comment);
+END;
+"""
+HAS_FTS_TABLE = "SELECT 1 FROM sqlite_master WHERE name = 'reviews_fts'"
+REBUILD_FTS = "INSERT INTO reviews_fts (reviews_fts) VALUES ('rebuild')"
+
+SELECT_QUIZ = "SELECT results FROM quiz_results WHERE session = ?"
+SELECT_FRESH_QUIZ = """
+SELECT results FROM quiz_results
+WHERE session = ? AND updated_at >= strftime('%Y-%m-%dT%H:%M:%f', 'now', ?)
+"""
+DELETE_STALE_QUIZ = "DELETE FROM quiz_results WHERE updated_at < strftime('%Y-%m-%dT%H:%M:%f', 'now', ?)"
+UPSERT_QUIZ = """
+INSERT INTO quiz_results (session, results) VALUES (?, ?)
+ON CONFLICT (session) DO UPDATE SET results = excluded.results,
+    updated_at = strftime('%Y-%m-%dT%H:%M:%f', 'now')
+"""
+SELECT_REVIEWS = """
+SELECT author, rating, comment, date FROM reviews
+WHERE neighborhood = ? ORDER BY date DESC, id DESC
+"""
+SELECT_REVIEWS_PAGE = """
+SELECT author, rating, comment, date, id FROM reviews
+WHERE neighborhood = ? ORDER BY date DESC, id DESC LIMIT ?
+"""
+SELECT_REVIEWS_AFTER = """
+SELECT author, rating, comment, date, id FROM reviews
+WHERE neighborhood = ? AND (date, id) < (?, ?) ORDER BY date DESC, id DESC LIMIT ?
+"""
+SELECT_REVIEW_STATS = "SELECT neighborhood, count, rating_sum, r1, r2, r3, r4, r5 FROM review_stats"
+INSERT_REVIEW = "INSERT INTO reviews (neighborhood, author, rating, comment, date) VALUES (?, ?, ?, ?, ?)"
+# Optional neighborhood filter is a JSON array bound as one parameter, so it has no size limit
+SEARCH_REVIEWS = """
+SELECT r.neighborhood, r.author, r.rating, r.comment, r.date, bm25(reviews_fts) FROM reviews_fts
+JOIN reviews r ON r.id = reviews_fts.rowid
+WHERE reviews_fts MATCH ? AND (? IS NULL OR r.neighborhood IN (SELECT value FROM json_each(?)))
+ORDER BY bm25(reviews_fts) LIMIT ?
+"""
+SCAN_REVIEWS = """
+SELECT neighborhood, author, rating, comment, date, NULL FROM reviews
+WHERE {terms} AND (? IS NULL OR neighborhood IN (SELECT value FROM json_each(?)))
+ORDER BY date DESC, id DESC LIMIT ?
+"""
+COUNT_REVIEWS = "SELECT COUNT(*) FROM reviews"
+SELECT_META = "SELECT value FROM meta WHERE key = ?"
+INSERT_META = "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)"
+DELETE_META = "DELETE FROM meta WHERE key = ?"
+
+JSON_MIGRATION_KEY = 'migrated_json_state'
+JOURNAL_SEQ_KEY = 'journal_seq'
+# Names per IN (...) query, well under SQLite's bound-parameter limit
+STATS_BATCH = 500
+
+
+def _journal_key(journal):
+    return f'{JOURNAL_SEQ_KEY}:{journal}' if journal else JOURNAL_SEQ_KEY
+
+
+def _review_row(row):
+    return {'author': row[0], 'rating': row[1], 'comment': row[2], 'date': row[3]}
+
+
+def _search_row(row):
+    result = _review_row(row[1:5])
+    result['neighborhood'] = row[0]
+    # bm25() is lower for better matches; report it so higher is better
+    result['score'] = None if row[5] is None else round(-row[5], 4)
+    return result
+
+
+def search_terms(query):
+    """Lower-cased word tokens of a free-text query"""
+    return re.findall(r'\w+', query.lower())
+
+
+def _stats_row(row):
+    count, rating_sum = row[1], row[2]
+    return {
+        'count': count,
+        'average_rating': round(rating_sum / count, 2) if count else None,
+        'histogram': list(row[3:8])
+    }
+
+
+class StateStore:
+    def __init__(self, path=DEFAULT_DB_PATH, pool_size=DEFAULT_POOL_SIZE):
+        self.path = path
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._idle = []
+        self._idle_lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+        self.full_text = self._init_full_text()
+
+    def _init_full_text(self):
+        try:
+            with self._connection() as conn:
+                existed = conn.execute(HAS_FTS_TABLE).fetchone() is not None
+                conn.executescript(FTS_SCHEMA)
+                if not existed:
+                    # Index reviews written before the search index existed
+                    conn.execute(REBUILD_FTS)
+        except sqlite3.OperationalError as e:
+            print(f"Full-text review search unavailable ({e}); falling back to LIKE scans")
+            return False
+        return True
+
+    def _connect(self):
+        # Pooled connections move between threads, but only one uses each at a time
+        conn = sqlite3.connect(self.path, timeout=10.0, cached_statements=64, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # WAL + NORMAL: committed writes survive an app crash; only an OS crash can lose the last few
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """Borrow a pooled connection for one transaction: commit on success, roll back on error"""
+        self._slots.acquire()
+        try:
+            with self._idle_lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._connect()
+            try:
+                with conn:
+                    yield conn
+            finally:
+                with self._idle_lock:
+                    self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close the idle pooled connections"""
+        with self._idle_lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def get_quiz_results(self, session=DEFAULT_SESSION, max_age_seconds=None):
+        """Saved quiz answers for a session, or None (also None if older than max_age_seconds)"""
+        with self._connection() as conn:
+            if max_age_seconds is None:
+                row = conn.execute(SELECT_QUIZ, (session,)).fetchone()
+            else:
+                row = conn.execute(SELECT_FRESH_QUIZ, (session, f'-{int(max_age_seconds)} seconds')).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_quiz_results(self, results, session=DEFAULT_SESSION):
+        with self._connection() as conn:
+            conn.execute(UPSERT_QUIZ, (session, json.dumps(results)))
+
+    def delete_stale_quiz_results(self, max_age_seconds):
+        """Remove quiz results not written in max_age_seconds; returns how many were removed"""
+        with self._connection() as conn:
+            return conn.execute(DELETE_STALE_QUIZ, (f'-{int(max_age_seconds)} seconds',)).rowcount
+
+    def get_reviews(self, neighborhood):
+        """Reviews for one neighborhood, newest first"""
+        with self._connection() as conn:
+            rows = conn.execute(SELECT_REVIEWS, (neighborhood,)).fetchall()
+        return [_review_row(row) for row in rows]
+
+    def get_reviews_page(self, neighborhood, limit, after=None):
+        """
+        One page of a neighborhood's reviews, newest first
+
+        Args:
+            neighborhood: neighborhood name
+            limit: page size
+            after: (date, id) of the last review already served, or None for the first page
+
+        Returns:
+            (reviews, next_after): next_after is the (date, id) to pass for the
+            following page, or None on the last page
+        """
+        with self._connection() as conn:
+            if after is None:
+                rows = conn.execute(SELECT_REVIEWS_PAGE, (neighborhood, limit + 1)).fetchall()
+            else:
+                rows = conn.execute(SELECT_REVIEWS_AFTER, (neighborhood, after[0], after[1], limit + 1)).fetchall()
+        next_after = (rows[limit - 1][3], rows[limit - 1][4]) if len(rows) > limit else None
+        return [_review_row(row) for row in rows[:limit]], next_after
+
+    def review_stats(self, neighborhoods):
+        """
+        Running review totals for each name
+
+        Returns:
+            {name: {'count', 'average_rating', 'histogram'}}; names without
+            reviews get a zero count and no average
+        """
+        names = list(dict.fromkeys(neighborhoods))
+        stats = {}
+        with self._connection() as conn:
+            for start in range(0, len(names), STATS_BATCH):
+                batch = names[start:start + STATS_BATCH]
+                query = SELECT_REVIEW_STATS + f" WHERE neighborhood IN ({','.join('?' * len(batch))})"
+                for row in conn.execute(query, batch):
+                    stats[row[0]] = _stats_row(row)
+        return {name: stats.get(name) or _stats_row((name, 0, 0, 0, 0, 0, 0, 0)) for name in names}
+
+    def search_reviews(self, query, neighborhoods=None, limit=20):
+        """
+        Reviews whose comments contain every word of query, best match first
+
+        Args:
+            query: free text; punctuation is ignored and words are stemmed
+            neighborhoods: optional names to restrict the search to
+            limit: maximum results
+
+        Returns:
+            list of review dicts with 'neighborhood' and a BM25 'score'
+            (None when ranking is unavailable)
+
+        Raises:
+            ValueError: if query has no words
+        """
+        terms = search_terms(query)
+        if not terms:
+            raise ValueError('query must contain at least one word')
+        names = None if neighborhoods is None else json.dumps(list(neighborhoods))
+        with self._connection() as conn:
+            if self.full_text:
+                match = ' '.join(f'"{term}"' for term in terms)
+                rows = conn.execute(SEARCH_REVIEWS, (match, names, names, limit)).fetchall()
+            else:
+                sql = SCAN_REVIEWS.format(terms=' AND '.join(['comment LIKE ?'] * len(terms)))
+                rows = conn.execute(sql, [f'%{term}%' for term in terms] + [names, names, limit]).fetchall()
+        return [_search_row(row) for row in rows]
+
+    def add_review(self, neighborhood, review):
+        """Store one review dict (author, rating, comment, date); review_stats updates with it"""
+        with self._connection() as conn:
+            conn.execute(INSERT_REVIEW, (
+                neighborhood, review['author'], review['rating'], review['comment'], review['date']
+            ))
+
+    def add_reviews(self, reviews_by_neighborhood):
+        """Store {neighborhood: [review, ...]} in one transaction"""
+        with self._connection() as conn:
+            self._insert_reviews(conn, reviews_by_neighborhood)
+
+    def seed_reviews(self, reviews_by_neighborhood):
+        """Store {neighborhood: [review, ...]} only if there are no reviews yet; True if stored"""
+        with self._connection() as conn:
+            # Check and insert under the write lock so concurrent starters seed once
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute(COUNT_REVIEWS).fetchone()[0]:
+                return False
+            self._insert_reviews(conn, reviews_by_neighborhood)
+            return True
+
+    @staticmethod
+    def _insert_reviews(conn, reviews_by_neighborhood):
+        # Lists are newest first; insert oldest first so ids grow with recency
+        conn.executemany(INSERT_REVIEW, [
+            (neighborhood, r.get('author', 'Anonymous'), int(r.get('rating', 5)), r.get('comment', ''),
+             r.get('date', ''))
+            for neighborhood, reviews in reviews_by_neighborhood.items()
+            for r in reversed(reviews)
+        ])
+
+    def write_batch(self, quiz_results, reviews, journal_seq=None, journal=''):
+        """
+        Apply buffered writes in one transaction
+
+        Args:
+            quiz_results: {session: results}
+            reviews: [(neighborhood, review)] oldest first
+            journal_seq: sequence number of the last journal entry included,
+                recorded with the data so a replay can skip what is already stored
+            journal: name of the journal the sequence number belongs to;
+                each writer process numbers its own journal
+        """
+        with self._connection() as conn:
+            conn.executemany(UPSERT_QUIZ, [
+                (session, json.dumps(results)) for session, results in quiz_results.items()
+            ])
+            conn.executemany(INSERT_REVIEW, [
+                (neighborhood, r['author'], r['rating'], r['comment'], r['date'])
+                for neighborhood, r in reviews
+            ])
+            if journal_seq is not None:
+                conn.execute(INSERT_META, (_journal_key(journal), str(journal_seq)))
+
+    def journal_seq(self, journal=''):
+        """Sequence number of the last entry of a journal written by write_batch (0 if none)"""
+        with self._connection() as conn:
+            row = conn.execute(SELECT_META, (_journal_key(journal),)).fetchone()
+        return int(row[0]) if row else 0
+
+    def forget_journal(self, journal=''):
+        """Drop a journal's sequence number once the journal itself is gone"""
+        with self._connection() as conn:
+            conn.execute(DELETE_META, (_journal_key(journal),))
+
+    def review_count(self):
+        with self._connection() as conn:
+            return conn.execute(COUNT_REVIEWS).fetchone()[0]
+
+    def migrate_json(self, json_path):
+        """
+        Import a legacy app_state.json once
+
+        Safe when several workers start together: the import runs in a
+        BEGIN IMMEDIATE transaction that re-checks the migration marker, so
+        only the first process imports and the rest see the marker (or a
+        file already renamed away). The import and its marker commit
+        together, so a crash midway leaves nothing behind and the next start
+        retries. The JSON file is then renamed to <name>.migrated.
+
+        Returns:
+            bool: True if this call imported the file
+        """
+        if not os.path.exists(json_path):
+            return False
+        imported = False
+        with self._connection() as conn:
+            # Takes the write lock now, so concurrent starters queue here instead of all importing
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute(SELECT_META, (JSON_MIGRATION_KEY,)).fetchone() is None:
+                try:
+                    with open(json_path, 'r') as f:
+                        state = json.load(f)
+                except FileNotFoundError:
+                    # Another process imported and renamed it between our checks
+                    return False
+                except json.JSONDecodeError:
+                    print(f"Skipping unreadable state file {json_path}")
+                    return False
+                if state.get('quiz_results'):
+                    conn.execute(UPSERT_QUIZ, (DEFAULT_SESSION, json.dumps(state['quiz_results'])))
+                self._insert_reviews(conn, state.get('reviews') or {})
+                conn.execute(INSERT_META, (JSON_MIGRATION_KEY, os.path.abspath(json_path)))
+                imported = True
+        if imported:
+            print(f"Migrated {json_path} into {self.path}")
+        try:
+            os.replace(json_path, json_path + '.migrated')
+        except FileNotFoundError:
+            pass  # another process renamed it first
+        return imported
@@ -0,0 +1,76 @@
+"""
+Parity of the compiled numpy engine with the shipped sklearn pipeline
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from compiled_model import compile_pipeline
+from model_predictor import load_pipeline
+from neighborhood_data import get_nyc_neighborhoods
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'models', 'advanced_house_price_model.joblib')
+RTOL = 1e-6
+
+
+def _location(neighborhood):
+    return {
+        'ADMINISTRATIVE_AREA_LEVEL_2': neighborhood['admin_area'],
+        'LOCALITY': neighborhood['locality'],
+        'SUBLOCALITY': neighborhood['sublocality'],
+        'STREET_NAME': neighborhood['street_name'],
+        'LATITUDE': neighborhood['lat'],
+        'LONGITUDE': neighborhood['lng']
+    }
+
+
+@pytest.fixture(scope='module')
+def pipeline():
+    if not os.path.exists(MODEL_PATH):
+        pytest.skip(f'{MODEL_PATH} is not present')
+    return load_pipeline(MODEL_PATH)
+
+
+@pytest.fixture(scope='module')
+def compiled(pipeline):
+    return compile_pipeline(pipeline)
+
+
+def assert_parity(pipeline, compiled, rows):
+    expected = np.asarray(pipeline.predict(pd.DataFrame(rows)), dtype=float)
+    np.testing.assert_allclose(compiled.predict(rows), expected, rtol=RTOL, atol=1e-6)
+
+
+def test_neighborhood_rows(pipeline, compiled):
+    rows = [
+        {'TYPE': property_type, 'BEDS': beds, 'BATH': baths, 'PROPERTYSQFT': sqft, **_location(n)}
+        for n in get_nyc_neighborhoods()
+        for property_type, beds, baths, sqft in (
+            ('CONDO', 2, 1, 1000), ('HOUSE', 4, 2.5, 2400), ('APARTMENT', 0, 1, 450)
+        )
+    ]
+    assert_parity(pipeline, compiled, rows)
+
+
+def test_unseen_categories(pipeline, compiled):
+    neighborhood = get_nyc_neighborhoods()[0]
+    rows = [
+        {'TYPE': 'HOUSEBOAT', 'BEDS': 2, 'BATH': 1, 'PROPERTYSQFT': 900, **_location(neighborhood)},
+        {'TYPE': 'CONDO', 'BEDS': 3, 'BATH': 2, 'PROPERTYSQFT': 1500,
+         **_location(neighborhood), 'SUBLOCALITY': 'Atlantis', 'STREET_NAME': 'Nowhere Street'},
+    ]
+    assert_parity(pipeline, compiled, rows)
+
+
+def test_missing_numerics(pipeline, compiled):
+    neighborhood = get_nyc_neighborhoods()[1]
+    rows = [
+        {'TYPE': 'CONDO', 'BEDS': np.nan, 'BATH': 1, 'PROPERTYSQFT': 800, **_location(neighborhood)},
+        {'TYPE': 'CONDO', 'BEDS': 2, 'BATH': np.nan, 'PROPERTYSQFT': np.nan, **_location(neighborhood)},
+        {'TYPE': 'HOUSE', 'BEDS': 3, 'BATH': 2, 'PROPERTYSQFT': 1800,
+         **_location(neighborhood), 'LATITUDE': np.nan, 'LONGITUDE': np.nan},
+    ]
+    assert_parity(pipeline, compiled, rows)
@@ -0,0 +1,89 @@
+"""
+Cursor paging of /api/predict and /api/neighborhood/<name>/reviews through the app
+"""
+import importlib
+import os
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(BACKEND_DIR, 'models', 'advanced_house_price_model.joblib')
+
+
+@pytest.fixture(scope='module')
+def app_module(tmp_path_factory):
+    if not os.path.exists(MODEL_PATH):
+        pytest.skip(f'{MODEL_PATH} is not present')
+    with pytest.MonkeyPatch.context() as mp:
+        # The app resolves its data files relative to the backend directory
+        mp.chdir(BACKEND_DIR)
+        mp.setenv('STATE_DB_PATH', str(tmp_path_factory.mktemp('state') / 'app_state.db'))
+        mp.setenv('STATE_WRITE_MODE', 'sync')
+        mp.setenv('MODEL_LOAD_ASYNC', '0')
+        yield importlib.import_module('app')
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+def _pages(fetch):
+    """Follow next_cursor from the first page to the last; returns the pages"""
+    pages, cursor = [], None
+    while True:
+        page = fetch(cursor)
+        pages.append(page)
+        cursor = page.get('next_cursor')
+        if cursor is None:
+            return pages
+
+
+def test_predict_cursor_round_trip_with_ties(client, app_module):
+    # An unreachable budget and no quiz leave only a few distinct combined scores, so most rows tie
+    request = {'budget': 1, 'beds': 2, 'baths': 1, 'fields': ['name', 'combined_score']}
+
+    def fetch(cursor):
+        response = client.post('/api/predict', json={**request, 'limit': 7, 'cursor': cursor})
+        assert response.status_code == 200
+        return response.get_json()
+
+    pages = _pages(fetch)
+    served = [p for page in pages for p in page['predictions']]
+    everything = client.post('/api/predict', json=request).get_json()['predictions']
+
+    assert len({p['combined_score'] for p in everything}) < len(everything) // 7
+    assert all(len(page['predictions']) == 7 for page in pages[:-1])
+    assert served == everything
+    # Best score first, ties in catalog order
+    position = {n['name']: i for i, n in enumerate(app_module.catalog)}
+    assert served == sorted(served, key=lambda p: (-p['combined_score'], position[p['name']]))
+    assert len(served) == len(app_module.catalog)
+
+
+def test_predict_rejects_bad_cursor(client):
+    response = client.post('/api/predict', json={'budget': 1, 'limit': 5, 'cursor': 'not-a-cursor'})
+    assert response.status_code == 400
+
+
+def test_reviews_cursor_round_trip_with_equal_dates(client, app_module):
+    name = 'Pagination Test Heights'
+    app_module.state_store.add_reviews({name: [
+        {'author': f'same-day-{i}', 'rating': 1 + i % 5, 'comment': 'Tied', 'date': '2024-05-01'}
+        for i in range(5)
+    ] + [{'author': 'oldest', 'rating': 3, 'comment': 'First', 'date': '2023-01-01'}]})
+
+    def fetch(cursor):
+        response = client.get(f'/api/neighborhood/{name}/reviews',
+                              query_string={'limit': 2, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200
+        return response.get_json()
+
+    pages = _pages(fetch)
+    served = [r['author'] for page in pages for r in page['reviews']]
+    assert served == [f'same-day-{i}' for i in range(5)] + ['oldest']
+    assert len(pages) == 3
+    assert pages[0]['review_summary']['count'] == 6
+
+    response = client.get(f'/api/neighborhood/{name}/reviews', query_string={'cursor': '%%%'})
+    assert response.status_code == 400
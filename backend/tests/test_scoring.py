@@ -0,0 +1,88 @@
+"""
+Parity of the vectorized scoring paths with calculate_compatibility_score
+"""
+import numpy as np
+import pytest
+
+from neighborhood_data import get_catalog, get_nyc_neighborhoods
+from scoring_engine import (
+    ATTRIBUTE_COMPONENTS, BREAKDOWN_COMPONENTS, COMMUTE_WEIGHT, DEMOGRAPHIC_WEIGHT, NeighborhoodMatrix,
+    ProfileMatrix, calculate_compatibility_score, get_score_breakdown, score_neighborhoods,
+    score_neighborhoods_with_breakdown, score_profiles, top_k_per_profile
+)
+
+PROFILES = [
+    {},
+    {'walkability': 9, 'nightlife': 2},
+    {'walkability': 3, 'food_importance': 8, 'nightlife': 9, 'public_transit': 10, 'parks': 1,
+     'diversity': 6, 'safety': 7, 'age_group_preference': 'young_professionals'},
+    {'safety': 10, 'parks': 9, 'age_group_preference': 'no_preference',
+     'target_location': {'lat': 40.7580, 'lng': -73.9855}, 'max_commute_miles': 5},
+    {'age_group_preference': 'retirees_on_mars',
+     'target_location': {'lat': 40.6782, 'lng': -73.9442}, 'max_commute_miles': 0},
+]
+WEIGHTS = dict(zip(BREAKDOWN_COMPONENTS, [c[4] for c in ATTRIBUTE_COMPONENTS] + [COMMUTE_WEIGHT, DEMOGRAPHIC_WEIGHT]))
+
+
+@pytest.fixture(scope='module')
+def neighborhoods():
+    return get_nyc_neighborhoods()
+
+
+@pytest.fixture(scope='module', params=['records', 'store'])
+def matrix(request, neighborhoods):
+    if request.param == 'records':
+        return NeighborhoodMatrix(neighborhoods)
+    return NeighborhoodMatrix.from_store(get_catalog().store)
+
+
+def scalar_scores(quiz_results, neighborhoods):
+    return np.array([calculate_compatibility_score(quiz_results, n) for n in neighborhoods])
+
+
+@pytest.mark.parametrize('quiz_results', PROFILES)
+def test_score_neighborhoods(quiz_results, neighborhoods, matrix):
+    np.testing.assert_allclose(score_neighborhoods(quiz_results, matrix),
+                               scalar_scores(quiz_results, neighborhoods), rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize('quiz_results', PROFILES)
+def test_breakdown_explains_score(quiz_results, neighborhoods, matrix):
+    scores, components = score_neighborhoods_with_breakdown(quiz_results, matrix)
+    np.testing.assert_allclose(scores, scalar_scores(quiz_results, neighborhoods), rtol=0, atol=1e-9)
+    if not quiz_results:
+        assert all(np.isnan(values).all() for values in components.values())
+        return
+    # The weighted average of the applicable components is the score
+    total = sum(np.nan_to_num(components[name]) * WEIGHTS[name] for name in BREAKDOWN_COMPONENTS)
+    weights = sum(np.where(np.isnan(components[name]), 0, WEIGHTS[name]) for name in BREAKDOWN_COMPONENTS)
+    np.testing.assert_allclose(np.clip(total / weights, 0, 100), scores, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize('quiz_results', PROFILES)
+def test_get_score_breakdown(quiz_results, neighborhoods, matrix):
+    _, components = score_neighborhoods_with_breakdown(quiz_results, matrix)
+    for i in (0, len(neighborhoods) // 2, len(neighborhoods) - 1):
+        breakdown = get_score_breakdown(quiz_results, neighborhoods[i])
+        assert list(breakdown) == list(BREAKDOWN_COMPONENTS)
+        for name in BREAKDOWN_COMPONENTS:
+            expected = components[name][i]
+            assert breakdown[name] == pytest.approx(0 if np.isnan(expected) else expected)
+
+
+@pytest.mark.parametrize('chunk_size', [None, 1, 2, len(PROFILES) + 1])
+def test_score_profiles_chunked(chunk_size, neighborhoods, matrix):
+    scores = score_profiles(ProfileMatrix(PROFILES, matrix), matrix, chunk_size)
+    expected = np.array([scalar_scores(quiz_results, neighborhoods) for quiz_results in PROFILES])
+    np.testing.assert_allclose(scores, expected, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize('chunk_size', [None, 2])
+def test_top_k_per_profile(chunk_size, neighborhoods, matrix):
+    k = 5
+    indices, top_scores = top_k_per_profile(ProfileMatrix(PROFILES, matrix), matrix, k, chunk_size)
+    for p, quiz_results in enumerate(PROFILES):
+        expected = scalar_scores(quiz_results, neighborhoods)
+        # Ties may pick different neighborhoods, but never different scores
+        np.testing.assert_allclose(top_scores[p], np.sort(expected)[::-1][:k], rtol=0, atol=1e-9)
+        np.testing.assert_allclose(expected[indices[p]], top_scores[p], rtol=0, atol=1e-9)
@@ -0,0 +1,73 @@
+"""
+SessionStore: sharded memory cache over the StateStore
+"""
+import pytest
+
+from session_store import SessionStore
+from state_store import StateStore
+
+
+@pytest.fixture
+def backing(tmp_path):
+    store = StateStore(str(tmp_path / 'state.db'), pool_size=2)
+    yield store
+    store.close()
+
+
+def _expire_memory(sessions):
+    for shard in sessions._shards:
+        with shard.lock:
+            shard.entries = {s: (value, 0) for s, (value, _) in shard.entries.items()}
+
+
+def test_memory_only():
+    sessions = SessionStore(shards=4, ttl_seconds=60)
+    assert sessions.get('a') is None
+    sessions.set('a', {'parks': 1})
+    sessions.set('b', {'parks': 2})
+    assert sessions.get('a') == {'parks': 1}
+    assert len(sessions) == 2
+    # Without a backing store memory is the only copy and keeps the full TTL
+    assert sessions.memory_seconds == 60
+
+
+def test_purge_expired_memory_only():
+    sessions = SessionStore(shards=4, ttl_seconds=60)
+    sessions.set('a', {'parks': 1})
+    _expire_memory(sessions)
+    assert sessions.purge_expired() == 1
+    assert len(sessions) == 0
+    assert sessions.get('a') is None
+
+
+def test_write_through_and_read_through(backing):
+    writer = SessionStore(backing, shards=4)
+    writer.set('a', {'safety': 9})
+    assert backing.get_quiz_results('a') == {'safety': 9}
+    # A cold store (another worker, or after a restart) reads it back
+    reader = SessionStore(backing, shards=4)
+    assert reader.get('a') == {'safety': 9}
+    assert reader.get('missing') is None
+
+
+def test_other_workers_writes_seen_after_cache_expires(backing):
+    first = SessionStore(backing, shards=4, cache_seconds=5)
+    second = SessionStore(backing, shards=4, cache_seconds=5)
+    first.set('a', {'nightlife': 1})
+    assert second.get('a') == {'nightlife': 1}
+    first.set('a', {'nightlife': 9})
+    # Served from second's cache until cache_seconds have passed
+    assert second.get('a') == {'nightlife': 1}
+    _expire_memory(second)
+    assert second.get('a') == {'nightlife': 9}
+
+
+def test_ttl_applies_to_backing(backing):
+    sessions = SessionStore(backing, shards=4, ttl_seconds=60)
+    sessions.set('a', {'parks': 4})
+    with backing._connection() as conn:
+        conn.execute("UPDATE quiz_results SET updated_at = strftime('%Y-%m-%dT%H:%M:%f', 'now', '-1 hours')")
+    _expire_memory(sessions)
+    assert sessions.get('a') is None
+    sessions.purge_expired()
+    assert backing.get_quiz_results('a') is None
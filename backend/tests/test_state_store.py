@@ -0,0 +1,123 @@
+"""
+StateStore: quiz results, review pages, stats, search, batches and the JSON migration
+"""
+import json
+
+import pytest
+
+from state_store import DEFAULT_SESSION, StateStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StateStore(str(tmp_path / 'state.db'), pool_size=2)
+    yield store
+    store.close()
+
+
+def _review(author, rating, date, comment='Nice block'):
+    return {'author': author, 'rating': rating, 'comment': comment, 'date': date}
+
+
+def _backdate_quiz(store, session, seconds):
+    with store._connection() as conn:
+        conn.execute("UPDATE quiz_results SET updated_at = strftime('%Y-%m-%dT%H:%M:%f', 'now', ?) "
+                     "WHERE session = ?", (f'-{seconds} seconds', session))
+
+
+def test_quiz_results_per_session(store):
+    assert store.get_quiz_results('a') is None
+    store.set_quiz_results({'walkability': 7}, 'a')
+    store.set_quiz_results({'walkability': 2})
+    assert store.get_quiz_results('a') == {'walkability': 7}
+    assert store.get_quiz_results(DEFAULT_SESSION) == {'walkability': 2}
+    store.set_quiz_results({'walkability': 9}, 'a')
+    assert store.get_quiz_results('a') == {'walkability': 9}
+
+
+def test_stale_quiz_results(store):
+    store.set_quiz_results({'parks': 1}, 'old')
+    store.set_quiz_results({'parks': 2}, 'new')
+    _backdate_quiz(store, 'old', 3600)
+    assert store.get_quiz_results('old') == {'parks': 1}
+    assert store.get_quiz_results('old', max_age_seconds=60) is None
+    assert store.get_quiz_results('new', max_age_seconds=60) == {'parks': 2}
+    assert store.delete_stale_quiz_results(60) == 1
+    assert store.get_quiz_results('old') is None
+
+
+def test_review_pages_with_equal_dates(store):
+    # Newest first; five reviews share a date so pages must break ties by id
+    store.add_reviews({'Harlem': [_review(f'r{i}', 4, '2024-05-01') for i in range(5)]
+                       + [_review('first', 3, '2024-01-01')]})
+    store.add_review('Harlem', _review('latest', 5, '2024-06-01'))
+    store.add_review('SoHo', _review('elsewhere', 1, '2024-07-01'))
+
+    served, after = [], None
+    while True:
+        page, after = store.get_reviews_page('Harlem', 2, after)
+        assert len(page) <= 2
+        served.extend(page)
+        if after is None:
+            break
+    assert served == store.get_reviews('Harlem')
+    assert [r['author'] for r in served] == ['latest', 'r0', 'r1', 'r2', 'r3', 'r4', 'first']
+
+
+def test_review_stats(store):
+    store.add_reviews({'Harlem': [_review('a', 5, '2024-02-01'), _review('b', 2, '2024-01-01')]})
+    store.add_review('Harlem', _review('c', 5, '2024-03-01'))
+    stats = store.review_stats(['Harlem', 'Nowhere', 'Harlem'])
+    assert list(stats) == ['Harlem', 'Nowhere']
+    assert stats['Harlem'] == {'count': 3, 'average_rating': 4.0, 'histogram': [0, 1, 0, 0, 2]}
+    assert stats['Nowhere'] == {'count': 0, 'average_rating': None, 'histogram': [0, 0, 0, 0, 0]}
+
+
+def test_search_reviews(store):
+    store.add_reviews({
+        'Harlem': [_review('a', 5, '2024-01-01', 'Great jazz clubs and brunch')],
+        'SoHo': [_review('b', 4, '2024-01-02', 'Brunch spots everywhere, pricey shopping')]
+    })
+    assert {r['neighborhood'] for r in store.search_reviews('brunch')} == {'Harlem', 'SoHo'}
+    assert [r['author'] for r in store.search_reviews('Jazz, brunch!')] == ['a']
+    assert [r['neighborhood'] for r in store.search_reviews('brunch', neighborhoods=['SoHo'])] == ['SoHo']
+    assert store.search_reviews('opera') == []
+    with pytest.raises(ValueError):
+        store.search_reviews('?!')
+
+
+def test_write_batch_records_journal_seq(store):
+    assert store.journal_seq('j.1.jsonl') == 0
+    store.write_batch({'a': {'parks': 3}}, [('Harlem', _review('a', 4, '2024-01-01'))], 7, 'j.1.jsonl')
+    store.write_batch({}, [('Harlem', _review('b', 2, '2024-01-02'))], 2, 'j.2.jsonl')
+    assert store.get_quiz_results('a') == {'parks': 3}
+    assert store.review_count() == 2
+    assert store.journal_seq('j.1.jsonl') == 7
+    assert store.journal_seq('j.2.jsonl') == 2
+    store.forget_journal('j.1.jsonl')
+    assert store.journal_seq('j.1.jsonl') == 0
+
+
+def test_seed_reviews_only_once(store):
+    assert store.seed_reviews({'Harlem': [_review('a', 5, '2024-01-01')]})
+    assert not store.seed_reviews({'Harlem': [_review('b', 5, '2024-01-01')]})
+    assert store.review_count() == 1
+
+
+def test_migrate_json(store, tmp_path):
+    legacy = tmp_path / 'app_state.json'
+    legacy.write_text(json.dumps({
+        'quiz_results': {'safety': 8},
+        'reviews': {'Harlem': [_review('new', 5, '2024-02-01'), _review('old', 3, '2024-01-01')]}
+    }))
+    assert store.migrate_json(str(legacy))
+    assert not legacy.exists()
+    assert (tmp_path / 'app_state.json.migrated').exists()
+    assert store.get_quiz_results() == {'safety': 8}
+    assert [r['author'] for r in store.get_reviews('Harlem')] == ['new', 'old']
+
+    # A second copy of the file is not imported again
+    legacy.write_text(json.dumps({'reviews': {'Harlem': [_review('again', 1, '2024-03-01')]}}))
+    assert not store.migrate_json(str(legacy))
+    assert store.review_count() == 2
+    assert not store.migrate_json(str(tmp_path / 'missing.json'))
@@ -0,0 +1,114 @@
+"""
+WriteBehindStore: buffering, crash replay from the journal and per-process journals
+"""
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+import write_behind
+from state_store import StateStore
+from write_behind import WriteBehindStore, process_journal_path
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REVIEW = {'author': 'a', 'rating': 4, 'comment': 'Quiet streets', 'date': '2024-01-01'}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StateStore(str(tmp_path / 'state.db'), pool_size=2)
+    yield store
+    store.close()
+
+
+def _run_worker(tmp_path, body):
+    """Run body in a separate process with store and journal set up; it prints its pid first"""
+    script = textwrap.dedent('''
+        import os, sys
+        sys.path.insert(0, {backend!r})
+        from state_store import StateStore
+        from write_behind import WriteBehindStore
+        store = StateStore({db!r})
+        journal = WriteBehindStore(store, flush_seconds=3600, journal_path={journal!r})
+        print(os.getpid(), flush=True)
+    ''').format(backend=BACKEND_DIR, db=str(tmp_path / 'state.db'),
+                journal=str(tmp_path / 'journal.jsonl')) + textwrap.dedent(body)
+    return subprocess.Popen([sys.executable, '-c', script], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+
+
+def test_buffered_writes_flush(store, tmp_path):
+    journal = WriteBehindStore(store, flush_seconds=3600, journal_path=str(tmp_path / 'journal.jsonl'))
+    journal.set_quiz_results({'parks': 1}, 'a')
+    journal.set_quiz_results({'parks': 2}, 'a')
+    journal.add_review('Harlem', REVIEW)
+    assert journal.get_quiz_results('a') == {'parks': 2}
+    assert store.get_quiz_results('a') is None
+    assert journal.pending() == 2
+    assert journal.flush() == 2
+    assert store.get_quiz_results('a') == {'parks': 2}
+    assert store.review_count() == 1
+    journal.close()
+    assert not [name for name in os.listdir(tmp_path) if name.startswith('journal')]
+
+
+def test_crash_before_flush_is_replayed(store, tmp_path):
+    worker = _run_worker(tmp_path, '''
+        journal.set_quiz_results({'safety': 3}, 'flushed')
+        journal.flush()
+        journal.set_quiz_results({'safety': 5}, 'flushed')
+        journal.set_quiz_results({'safety': 8}, 'pending')
+        journal.add_review('Harlem', {'author': 'a', 'rating': 4, 'comment': 'Quiet streets', 'date': '2024-01-01'})
+        os._exit(1)
+    ''')
+    pid = int(worker.stdout.readline())
+    assert worker.wait() == 1
+    assert store.get_quiz_results('pending') is None
+    assert os.path.exists(process_journal_path(str(tmp_path / 'journal.jsonl'), pid))
+
+    journal = WriteBehindStore(store, flush_seconds=3600, journal_path=str(tmp_path / 'journal.jsonl'))
+    assert store.get_quiz_results('flushed') == {'safety': 5}
+    assert store.get_quiz_results('pending') == {'safety': 8}
+    assert store.review_count() == 1
+    assert not any(str(pid) in name for name in os.listdir(tmp_path))
+    journal.close()
+
+    # Replaying never applies an entry twice
+    WriteBehindStore(store, flush_seconds=3600, journal_path=str(tmp_path / 'journal.jsonl')).close()
+    assert store.review_count() == 1
+
+
+def test_running_workers_journal_is_left_alone(store, tmp_path):
+    worker = _run_worker(tmp_path, '''
+        journal.set_quiz_results({'parks': 7}, 'live')
+        print('written', flush=True)
+        sys.stdin.readline()
+        journal.close()
+    ''')
+    pid = int(worker.stdout.readline())
+    assert worker.stdout.readline().strip() == 'written'
+    try:
+        journal = WriteBehindStore(store, flush_seconds=3600, journal_path=str(tmp_path / 'journal.jsonl'))
+        assert store.get_quiz_results('live') is None
+        assert os.path.exists(process_journal_path(str(tmp_path / 'journal.jsonl'), pid))
+        journal.close()
+    finally:
+        worker.kill()
+        worker.wait()
+
+
+def test_failed_rotation_keeps_journal_open(store, tmp_path, monkeypatch):
+    journal = WriteBehindStore(store, flush_seconds=3600, journal_path=str(tmp_path / 'journal.jsonl'))
+    journal.set_quiz_results({'parks': 1}, 'a')
+
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(write_behind, 'open', fail, raising=False)
+    assert journal.flush() == 1
+    monkeypatch.undo()
+    journal.set_quiz_results({'parks': 2}, 'a')
+    assert journal.flush() == 1
+    assert store.get_quiz_results('a') == {'parks': 2}
+    journal.close()
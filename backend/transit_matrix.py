@@ -0,0 +1,258 @@
+"""
+Neighborhood x station travel-time matrix built from a GTFS snapshot
+
+Build once from an unpacked GTFS feed (stops.txt, trips.txt, stop_times.txt
+and optionally transfers.txt):
+
+    python transit_matrix.py path/to/gtfs_subway
+
+Stops are collapsed to their parent stations. Each pair of consecutive
+stops on a trip becomes an edge weighted by its fastest scheduled run, and
+transfers.txt adds station-to-station transfer edges. For every
+neighborhood a multi-source Dijkstra starts from all stations within
+walking distance of its center (walk time plus an average wait) and
+records the minutes to reach every station.
+
+The result is a float32 matrix in models/transit_minutes.npy (np.inf for
+unreachable stations) with a JSON sidecar listing the neighborhoods and
+stations. At request time the commute to a target is one column lookup per
+neighborhood: the best of the few stations nearest the target plus the walk
+from there, or walking the whole way if that is faster.
+"""
+import argparse
+import csv
+import heapq
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+from scoring_engine import haversine_miles, haversine_miles_radians
+from spatial_index import SpatialIndex
+
+DEFAULT_TRANSIT_PATH = 'models/transit_minutes.npy'
+WALK_MPH = 3.0
+MAX_WALK_MILES = 1.0
+WAIT_MINUTES = 4.0
+EGRESS_STATIONS = 3
+
+
+def _sidecar_path(path):
+    return os.path.splitext(path)[0] + '.json'
+
+
+def _walk_minutes(miles, mph=WALK_MPH):
+    return miles / mph * 60
+
+
+def _parse_gtfs_time(value):
+    # GTFS times may run past 24:00:00 for trips after midnight
+    hours, minutes, seconds = (int(part) for part in value.strip().split(':'))
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def _read_csv(gtfs_dir, name):
+    with open(os.path.join(gtfs_dir, name), 'r', newline='', encoding='utf-8-sig') as f:
+        yield from csv.DictReader(f)
+
+
+def load_gtfs_graph(gtfs_dir):
+    """
+    Read a GTFS feed into a station graph
+
+    Returns:
+        (stations, edges): stations as a list of {'id', 'name', 'lat', 'lng'}
+        and edges as {station index: {station index: minutes}}
+    """
+    stops = {row['stop_id']: row for row in _read_csv(gtfs_dir, 'stops.txt')}
+
+    def station_of(stop_id):
+        parent = stops[stop_id].get('parent_station')
+        return parent if parent and parent in stops else stop_id
+
+    station_ids = sorted({station_of(stop_id) for stop_id in stops})
+    index = {station_id: i for i, station_id in enumerate(station_ids)}
+    stations = [
+        {
+            'id': station_id,
+            'name': stops[station_id].get('stop_name', station_id),
+            'lat': float(stops[station_id]['stop_lat']),
+            'lng': float(stops[station_id]['stop_lon'])
+        }
+        for station_id in station_ids
+    ]
+
+    edges = defaultdict(dict)
+
+    def add_edge(a, b, minutes):
+        if a != b and minutes < edges[a].get(b, np.inf):
+            edges[a][b] = minutes
+
+    trips = defaultdict(list)
+    for row in _read_csv(gtfs_dir, 'stop_times.txt'):
+        time_value = row.get('arrival_time') or row.get('departure_time')
+        if not time_value:
+            continue
+        trips[row['trip_id']].append((
+            int(row['stop_sequence']), _parse_gtfs_time(time_value),
+            index[station_of(row['stop_id'])]
+        ))
+    for stop_times in trips.values():
+        stop_times.sort()
+        for (_, t1, a), (_, t2, b) in zip(stop_times, stop_times[1:]):
+            add_edge(a, b, max(t2 - t1, 0) / 60)
+
+    if os.path.exists(os.path.join(gtfs_dir, 'transfers.txt')):
+        for row in _read_csv(gtfs_dir, 'transfers.txt'):
+            if row['from_stop_id'] not in stops or row['to_stop_id'] not in stops:
+                continue
+            seconds = float(row.get('min_transfer_time') or 0)
+            add_edge(index[station_of(row['from_stop_id'])], index[station_of(row['to_stop_id'])],
+                     seconds / 60)
+
+    return stations, edges
+
+
+def _multi_source_dijkstra(sources, edges, size):
+    minutes = np.full(size, np.inf)
+    heap = []
+    for station, start in sources.items():
+        minutes[station] = start
+        heap.append((start, station))
+    heapq.heapify(heap)
+    while heap:
+        current, station = heapq.heappop(heap)
+        if current > minutes[station]:
+            continue
+        for neighbor, weight in edges.get(station, {}).items():
+            candidate = current + weight
+            if candidate < minutes[neighbor]:
+                minutes[neighbor] = candidate
+                heapq.heappush(heap, (candidate, neighbor))
+    return minutes
+
+
+def build_transit_matrix(gtfs_dir, neighborhoods, output_path=DEFAULT_TRANSIT_PATH,
+                         max_walk_miles=MAX_WALK_MILES, wait_minutes=WAIT_MINUTES):
+    """
+    Precompute minutes from each neighborhood to every station and save them
+
+    Args:
+        gtfs_dir: directory of an unpacked GTFS feed
+        neighborhoods: dicts with 'name', 'lat' and 'lng'
+        output_path: .npy file to write; the sidecar goes next to it
+        max_walk_miles: how far a rider walks to the first station
+        wait_minutes: average wait added when boarding
+
+    Returns:
+        np.ndarray: (len(neighborhoods), stations) minutes
+    """
+    stations, edges = load_gtfs_graph(gtfs_dir)
+    station_lats = np.array([s['lat'] for s in stations])
+    station_lngs = np.array([s['lng'] for s in stations])
+
+    matrix = np.full((len(neighborhoods), len(stations)), np.inf, dtype=np.float32)
+    for i, neighborhood in enumerate(neighborhoods):
+        walk = haversine_miles(neighborhood['lat'], neighborhood['lng'], station_lats, station_lngs)
+        # The nearest station is always reachable on foot, even beyond max_walk_miles
+        reachable = (walk <= max_walk_miles) | (walk == walk.min())
+        sources = {int(s): _walk_minutes(walk[s]) + wait_minutes for s in np.flatnonzero(reachable)}
+        matrix[i] = _multi_source_dijkstra(sources, edges, len(stations))
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    np.save(output_path, matrix)
+    with open(_sidecar_path(output_path), 'w') as f:
+        json.dump({
+            'built_at': datetime.now().isoformat(),
+            'source': os.path.abspath(gtfs_dir),
+            'walk_mph': WALK_MPH,
+            'max_walk_miles': max_walk_miles,
+            'wait_minutes': wait_minutes,
+            'neighborhoods': [n['name'] for n in neighborhoods],
+            'stations': stations
+        }, f)
+    return matrix
+
+
+class TransitMatrix:
+    def __init__(self, minutes, neighborhood_names, stations, walk_mph=WALK_MPH):
+        """
+        Args:
+            minutes: (neighborhoods, stations) travel minutes
+            neighborhood_names: row labels
+            stations: column descriptions with 'lat' and 'lng'
+        """
+        self.minutes = minutes
+        self.rows = {name: i for i, name in enumerate(neighborhood_names)}
+        self.walk_mph = walk_mph
+        coords = np.array([[s['lat'], s['lng']] for s in stations], dtype=float).reshape(-1, 2)
+        self.station_radians = np.radians(coords)
+        self.station_index = SpatialIndex(self.station_radians)
+
+    @classmethod
+    def load(cls, path=DEFAULT_TRANSIT_PATH):
+        """Memory-map a built matrix, or return None if it has not been built"""
+        sidecar = _sidecar_path(path)
+        if not (os.path.exists(path) and os.path.exists(sidecar)):
+            return None
+        with open(sidecar, 'r') as f:
+            meta = json.load(f)
+        minutes = np.load(path, mmap_mode='r')
+        return cls(minutes, meta['neighborhoods'], meta['stations'], meta.get('walk_mph', WALK_MPH))
+
+    def align(self, names):
+        """Matrix row for each name, -1 where the neighborhood was not in the build"""
+        return np.array([self.rows.get(name, -1) for name in names], dtype=np.intp)
+
+    def minutes_to(self, rows, lat, lng, origin_radians=None):
+        """
+        Minutes from the neighborhoods at rows to one target point
+
+        Takes the best of the EGRESS_STATIONS stations nearest the target plus
+        the walk from there. With origin_radians ((len(rows), 2) [lat, lng]
+        of the neighborhoods) walking the whole way is considered too.
+
+        Returns:
+            np.ndarray: minutes per row, np.inf where no route exists and
+            NaN for rows of -1
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        stations, miles = self.station_index.nearest(lat, lng, EGRESS_STATIONS)
+        by_station = np.asarray(self.minutes[np.maximum(rows, 0)][:, stations], dtype=float)
+        minutes = (by_station + _walk_minutes(miles, self.walk_mph)).min(axis=1, initial=np.inf)
+        if origin_radians is not None:
+            walk = haversine_miles_radians(np.radians(lat), np.radians(lng),
+                                           origin_radians[:, 0], origin_radians[:, 1])
+            minutes = np.fmin(minutes, _walk_minutes(walk, self.walk_mph))
+        return np.where(rows >= 0, minutes, np.nan)
+
+    def commute_minutes(self, neighborhood, lat, lng):
+        """Minutes from one neighborhood dict to a target, or None if it was not in the build"""
+        row = self.rows.get(neighborhood.get('name'))
+        if row is None:
+            return None
+        origin = np.radians([[neighborhood['lat'], neighborhood['lng']]]) if 'lat' in neighborhood else None
+        return float(self.minutes_to([row], lat, lng, origin)[0])
+
+
+def main():
+    from neighborhood_data import get_nyc_neighborhoods
+
+    parser = argparse.ArgumentParser(description='Precompute neighborhood x station transit minutes')
+    parser.add_argument('gtfs_dir', help='directory of an unpacked GTFS feed')
+    parser.add_argument('--output', default=os.getenv('TRANSIT_MATRIX_PATH', DEFAULT_TRANSIT_PATH))
+    parser.add_argument('--max-walk-miles', type=float, default=MAX_WALK_MILES)
+    parser.add_argument('--wait-minutes', type=float, default=WAIT_MINUTES)
+    args = parser.parse_args()
+
+    matrix = build_transit_matrix(args.gtfs_dir, get_nyc_neighborhoods(), args.output,
+                                  args.max_walk_miles, args.wait_minutes)
+    reachable = np.isfinite(matrix).mean() * 100
+    print(f"Saved {matrix.shape[0]}x{matrix.shape[1]} transit matrix to {args.output} "
+          f"({matrix.nbytes / 1024:.0f} KiB, {reachable:.0f}% of pairs reachable)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+"""
+Write-behind persistence for StateStore
+
+Quiz results and new reviews are buffered in memory and returned to the
+caller immediately; a background thread writes them to SQLite in one
+transaction every flush_seconds, or sooner once max_pending writes are
+waiting. Repeated quiz writes for a session coalesce to the latest one.
+
+Durability modes:
+
+    memory   buffer only. A clean stop (SIGTERM/SIGINT, handled in
+             app.py, or interpreter exit) flushes everything, but a hard
+             kill (SIGKILL, OOM killer, power loss) or crash loses every
+             write since the last flush, up to one flush interval
+    journal  also append each write to a JSON-lines journal before
+             returning, so a process crash loses nothing. The journal is
+             rotated at every flush and the rotated file deleted once its
+             batch has committed; entries carry sequence numbers stored with
+             each batch, so replaying after a crash never applies one twice.
+
+Every process (e.g. each gunicorn worker) journals to its own file,
+journal_path with its pid inserted (state_journal.<pid>.jsonl), numbered
+from its own sequence, and holds an exclusive lock on <file>.lock while it
+runs. At startup, a process replays and removes every journal whose lock
+it can take, i.e. those left behind by processes that are gone.
+
+Quiz reads see buffered writes at once. Review reads (pages, stats,
+search) see a new review once it has been flushed. After close(), writes
+go straight to the store, so requests still finishing during shutdown are
+not lost.
+"""
+import atexit
+import json
+import os
+import re
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+MODES = ('memory', 'journal')
+DEFAULT_JOURNAL_PATH = 'data/state_journal.jsonl'
+
+
+def process_journal_path(journal_path, pid):
+    """The journal file a process writes: journal_path with the pid before the extension"""
+    root, ext = os.path.splitext(journal_path)
+    return f'{root}.{pid}{ext}'
+
+
+def _try_lock(lock_path):
+    """Open and exclusively lock lock_path; None if another process holds it"""
+    f = open(lock_path, 'a')
+    if fcntl is None:
+        # No advisory locks on this platform: assume one process per journal directory
+        return f
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+class WriteBehindStore:
+    def __init__(self, store, mode='journal', flush_seconds=1.0, max_pending=500,
+                 journal_path=DEFAULT_JOURNAL_PATH):
+        """
+        Args:
+            store: the StateStore to flush into
+            mode: 'memory' or 'journal' (see module docstring)
+            flush_seconds: longest a write waits before it is flushed
+            max_pending: buffered writes that trigger an early flush
+            journal_path: journal file for 'journal' mode; each process
+                writes its own copy, see process_journal_path
+
+        Raises:
+            ValueError: for an unknown mode
+        """
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        self.store = store
+        self.mode = mode
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.journal_base = journal_path
+        self.journal_path = process_journal_path(journal_path, os.getpid())
+        self._lock = threading.Lock()
+        # Held for a whole flush so batches reach SQLite in order
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._quiz = {}
+        self._reviews = []
+        # Batch taken from the buffers whose write has not committed yet (retried on failure)
+        self._flushing = None
+        self._seq = 0
+        self._journal = None
+        self._owner_lock = None
+        if mode == 'journal':
+            if os.path.dirname(journal_path):
+                os.makedirs(os.path.dirname(journal_path), exist_ok=True)
+            self._owner_lock = _try_lock(self.journal_path + '.lock')
+            if self._owner_lock is None:
+                raise RuntimeError(f"{self.journal_path} is locked by another process")
+            self._recover()
+            self._seq = store.journal_seq(self._journal_name)
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run, name='state-flusher', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def _journal_name(self):
+        return os.path.basename(self.journal_path)
+
+    @property
+    def _rotated_path(self):
+        return self.journal_path + '.flushing'
+
+    def _recover(self):
+        """Replay the journals of processes that are no longer running, including a previous holder of our pid"""
+        directory = os.path.dirname(self.journal_base) or '.'
+        root, ext = os.path.splitext(os.path.basename(self.journal_base))
+        pattern = re.compile(re.escape(root) + r'\.(\d+)' + re.escape(ext) + r'(\.flushing|\.lock)?$')
+        pids = sorted({int(m.group(1)) for m in map(pattern.match, os.listdir(directory)) if m})
+        for pid in pids:
+            path = process_journal_path(self.journal_base, pid)
+            if path == self.journal_path:
+                self._replay(path)
+                continue
+            lock = _try_lock(path + '.lock')
+            if lock is None:
+                # Its owner is still running
+                continue
+            try:
+                self._replay(path)
+                os.remove(path + '.lock')
+            finally:
+                lock.close()
+
+    def _replay(self, path):
+        """Apply a journal's entries newer than its last flushed batch, then drop its files"""
+        name = os.path.basename(path)
+        stored_seq = self.store.journal_seq(name)
+        quiz, reviews, last_seq = {}, [], stored_seq
+        files = [f for f in (path + '.flushing', path) if os.path.exists(f)]
+        for file in files:
+            with open(file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash mid-append
+                        continue
+                    if entry['seq'] <= stored_seq:
+                        continue
+                    if entry['op'] == 'quiz':
+                        quiz[entry['session']] = entry['results']
+                    else:
+                        reviews.append((entry['neighborhood'], entry['review']))
+                    last_seq = max(last_seq, entry['seq'])
+        if last_seq > stored_seq:
+            self.store.write_batch(quiz, reviews, last_seq, name)
+            print(f"Replayed {len(quiz)} quiz results and {len(reviews)} reviews from {path}")
+        for file in files:
+            os.remove(file)
+        # Only after the files are gone, so a crash in between still skips what was applied
+        self.store.forget_journal(name)
+
+    def _rotate(self):
+        """
+        Move the journal aside for the batch being flushed and start a new one.
+        The current file stays open until its replacement is, so appends always
+        have a journal to go to; if rotation fails they keep going to the old
+        one, whose already-flushed entries a replay skips by sequence number.
+        """
+        os.replace(self.journal_path, self._rotated_path)
+        try:
+            journal = open(self.journal_path, 'a', encoding='utf-8')
+        except OSError:
+            os.replace(self._rotated_path, self.journal_path)
+            raise
+        self._journal, previous = journal, self._journal
+        previous.close()
+
+    def _append(self, entry):
+        # Caller holds self._lock, so sequence numbers and journal order agree
+        self._seq += 1
+        if self._journal is not None:
+            entry['seq'] = self._seq
+            self._journal.write(json.dumps(entry) + '\n')
+            # Into the OS page cache: survives a process crash without waiting on the disk
+            self._journal.flush()
+        if len(self._quiz) + len(self._reviews) >= self.max_pending:
+            self._wake.set()
+
+    def set_quiz_results(self, results, session):
+        with self._lock:
+            if not self._stopped.is_set():
+                self._quiz[session] = results
+                self._append({'op': 'quiz', 'session': session, 'results': results})
+                return
+        self._write_through({session: results}, [])
+
+    def get_quiz_results(self, session, max_age_seconds=None):
+        with self._lock:
+            if session in self._quiz:
+                return self._quiz[session]
+            if self._flushing is not None and session in self._flushing[0]:
+                return self._flushing[0][session]
+        return self.store.get_quiz_results(session, max_age_seconds)
+
+    def add_review(self, neighborhood, review):
+        with self._lock:
+            if not self._stopped.is_set():
+                self._reviews.append((neighborhood, review))
+                self._append({'op': 'review', 'neighborhood': neighborhood, 'review': review})
+                return
+        self._write_through({}, [(neighborhood, review)])
+
+    def _write_through(self, quiz, reviews):
+        # After close(); waiting on the flush lock keeps these behind the final flush
+        with self._flush_lock:
+            self.store.write_batch(quiz, reviews)
+
+    def pending(self):
+        """Writes not yet committed to the store"""
+        with self._lock:
+            waiting = len(self._quiz) + len(self._reviews)
+            if self._flushing is not None:
+                waiting += len(self._flushing[0]) + len(self._flushing[1])
+            return waiting
+
+    def flush(self):
+        """
+        Write everything buffered so far to the store
+
+        Returns:
+            int: number of writes committed
+
+        Raises:
+            sqlite3.Error: if the write fails; the batch is kept and retried
+        """
+        with self._flush_lock:
+            with self._lock:
+                if self._flushing is None:
+                    if not self._quiz and not self._reviews:
+                        return 0
+                    self._flushing = (self._quiz, self._reviews, self._seq)
+                    self._quiz, self._reviews = {}, []
+                    if self._journal is not None:
+                        try:
+                            self._rotate()
+                        except OSError as e:
+                            print(f"Journal rotation failed, appending to {self.journal_path}: {e}")
+                quiz, reviews, seq = self._flushing
+            if self._journal is None:
+                self.store.write_batch(quiz, reviews)
+            else:
+                self.store.write_batch(quiz, reviews, seq, self._journal_name)
+            with self._lock:
+                self._flushing = None
+            if self.mode == 'journal' and os.path.exists(self._rotated_path):
+                os.remove(self._rotated_path)
+            return len(quiz) + len(reviews)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"State flush failed, will retry: {e}")
+
+    def close(self):
+        """Stop the flusher and write out anything still buffered"""
+        with self._lock:
+            if self._stopped.is_set():
+                return
+            # Under the lock, so every write lands either in the final flush or after it
+            self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout=max(self.flush_seconds, 5.0))
+        self.flush()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+                if os.path.getsize(self.journal_path) == 0:
+                    os.remove(self.journal_path)
+                    self.store.forget_journal(self._journal_name)
+                # A journal left with entries is replayed by the next process to start
+                os.remove(self.journal_path + '.lock')
+                self._owner_lock.close()
+
+    def __getattr__(self, name):
+        # Reads and startup-only writes (reviews, stats, search, migration) go straight to the store
+        return getattr(self.store, name)
@@ -4,6 +4,9 @@ import { housingAPI } from '../utils/api';
 const NeighborhoodModal = ({ neighborhood, onClose }) => {
   const [details, setDetails] = useState(null);
   const [reviews, setReviews] = useState([]);
+  const [reviewCount, setReviewCount] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [showReviewForm, setShowReviewForm] = useState(false);
   const [newReview, setNewReview] = useState({
@@ -23,6 +26,8 @@ const NeighborhoodModal = ({ neighborhood, onClose }) => {
         ]);
         setDetails(detailsResponse.data);
         setReviews(reviewsResponse.data.reviews || []);
+        setReviewCount(reviewsResponse.data.review_summary?.count ?? 0);
+        setNextCursor(reviewsResponse.data.next_cursor || null);
       } catch (error) {
         console.error('Error fetching neighborhood data:', error);
       } finally {
@@ -57,6 +62,7 @@ const NeighborhoodModal = ({ neighborhood, onClose }) => {
       setSubmitting(true);
       const response = await housingAPI.submitNeighborhoodReview(neighborhood.name, newReview);
       setReviews([response.data.review, ...reviews]);
+      setReviewCount(reviewCount + 1);
       setNewReview({ author: '', rating: 5, comment: '' });
       setShowReviewForm(false);
     } catch (error) {
@@ -67,6 +73,19 @@ const NeighborhoodModal = ({ neighborhood, onClose }) => {
     }
   };
 
+  const handleLoadMoreReviews = async () => {
+    try {
+      setLoadingMore(true);
+      const response = await housingAPI.getNeighborhoodReviews(neighborhood.name, nextCursor);
+      setReviews([...reviews, ...(response.data.reviews || [])]);
+      setNextCursor(response.data.next_cursor || null);
+    } catch (error) {
+      console.error('Error loading more reviews:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (!neighborhood) return null;
 
   return (
@@ -189,7 +208,7 @@ const NeighborhoodModal = ({ neighborhood, onClose }) => {
             <div className="border-t border-slate-200 pt-8">
               <div className="flex justify-between items-center mb-6">
                 <h3 className="text-xl font-semibold text-slate-900">
-                  Community Reviews ({reviews.length})
+                  Community Reviews ({reviewCount})
                 </h3>
                 <button
                   onClick={() => setShowReviewForm(!showReviewForm)}
@@ -283,6 +302,15 @@ const NeighborhoodModal = ({ neighborhood, onClose }) => {
                   ))
                 )}
               </div>
+              {nextCursor && (
+                <button
+                  onClick={handleLoadMoreReviews}
+                  disabled={loadingMore}
+                  className="w-full mt-4 px-6 py-3 border border-slate-300 text-slate-700 rounded-lg font-medium hover:bg-slate-50 transition-colors disabled:text-slate-400"
+                >
+                  {loadingMore ? 'Loading...' : 'Load More Reviews'}
+                </button>
+              )}
             </div>
           </div>
         )}
@@ -1,5 +1,6 @@
 import { useState } from 'react'
 import { useNavigate } from 'react-router-dom'
+import { authAPI } from '../utils/api'
 
 function Login() {
   const [isLogin, setIsLogin] = useState(true)
@@ -8,19 +9,23 @@ function Login() {
   const [loading, setLoading] = useState(false)
   const navigate = useNavigate()
 
-  const handleSubmit = (e) => {
+  const handleSubmit = async (e) => {
     e.preventDefault()
     setLoading(true)
 
-    // Store demo credentials locally so downstream requests work
-    localStorage.setItem('token', 'demo-token')
-    localStorage.setItem('email', email || 'guest@nyc.local')
-
-    // Give the UI a moment to show the loading state
-    setTimeout(() => {
-      setLoading(false)
+    // Each login gets its own session token, which keys this user's quiz results on the server
+    try {
+      const credentials = { email, password }
+      const response = isLogin ? await authAPI.login(credentials) : await authAPI.signup(credentials)
+      localStorage.setItem('token', response.data.token)
+      localStorage.setItem('email', response.data.email)
       navigate('/quiz')
-    }, 300)
+    } catch (error) {
+      console.error('Error signing in:', error)
+      alert('Failed to sign in')
+    } finally {
+      setLoading(false)
+    }
   }
 
   return (
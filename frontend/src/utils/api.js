@@ -33,6 +33,14 @@ api.interceptors.request.use(
   }
 )
 
+export const authAPI = {
+  login: (credentials) =>
+    api.post('/auth/login', credentials),
+
+  signup: (credentials) =>
+    api.post('/auth/signup', credentials),
+}
+
 export const quizAPI = {
   submit: (quizData) =>
     api.post('/quiz/submit', quizData),
@@ -48,8 +56,8 @@ export const housingAPI = {
   getNeighborhood: (name) =>
     api.get(`/neighborhood/${encodeURIComponent(name)}`),
 
-  getNeighborhoodReviews: (name) =>
-    api.get(`/neighborhood/${encodeURIComponent(name)}/reviews`),
+  getNeighborhoodReviews: (name, cursor) =>
+    api.get(`/neighborhood/${encodeURIComponent(name)}/reviews`, { params: cursor ? { cursor } : {} }),
 
   submitNeighborhoodReview: (name, reviewData) =>
     api.post(`/neighborhood/${encodeURIComponent(name)}/reviews`, reviewData),